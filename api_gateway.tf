@@ -33,6 +33,12 @@ module "http_api" {
       filename      = "${path.module}/functions/lambda_post_pools.zip"
       handler       = "lambda_post_pools.handler"
     }
+    get_product_facets = {
+      route_key     = "GET /products/facets"
+      function_name = "get_product_facets"
+      filename      = "${path.module}/functions/lambda_get_product_facets.zip"
+      handler       = "lambda_get_product_facets.handler"
+    }
     get_product_details = {
       route_key     = "GET /products/{id}"
       function_name = "get_product_details"
@@ -45,6 +51,16 @@ module "http_api" {
       filename      = "${path.module}/functions/lambda_get_pool_details.zip"
       handler       = "lambda_get_pool_details.handler"
     }
+    get_pool_progress = {
+      route_key     = "GET /pools/{id}/progress"
+      function_name = "get_pool_progress"
+      filename      = "${path.module}/functions/lambda_get_pool_progress.zip"
+      handler       = "lambda_get_pool_progress.handler"
+
+      # Cada ejecución tiene una conexión propia directa a la instancia
+      # mientras espera: el tope acota cuántas hay a la vez
+      reserved_concurrent_executions = var.pool_progress_max_concurrency
+    }
     get_requests = {
       route_key     = "GET /requests"
       function_name = "get_requests"
@@ -95,6 +111,12 @@ module "http_api" {
     }
   }
 
+  router = var.api_router_enabled ? {
+    function_name = "api_router"
+    filename      = "${path.module}/functions/lambda_router.zip"
+    handler       = "lambda_router.handler"
+  } : null
+
   role            = "arn:aws:iam::${data.aws_caller_identity.current.account_id}:role/LabRole"
   runtime         = var.lambda_runtime
   subnet_ids      = module.vpc.private_lambda_subnet_ids
@@ -103,12 +125,17 @@ module "http_api" {
 
   environment_variables = {
     DB_HOST            = aws_db_proxy.this.endpoint
+    DB_READER_HOST     = coalesce(var.db_reader_host, aws_db_proxy.this.endpoint)
+    DB_LISTEN_HOST     = aws_db_instance.this.address
     DB_PORT            = "5432"
     DB_NAME            = aws_db_instance.this.db_name
     DB_USER            = var.db_username
     DB_PASSWORD        = var.db_password
     IMAGES_BUCKET_NAME = aws_s3_bucket.images_bucket.bucket
     SNS_TOPIC_ARN      = aws_sns_topic.pool_notifications.arn
+
+    # "false" para que los listados armen el JSON en Python en lugar de Postgres
+    SERVER_SIDE_JSON = "true"
   }
 
   depends_on = [aws_db_proxy_target.this, aws_lambda_layer_version.psycopg2]
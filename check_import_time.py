@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Mide cuánto tarda en importarse cada handler de functions/ (lo que paga el
+cold start antes de la primera invocación) usando `python -X importtime`, y
+falla si alguno supera el presupuesto.
+
+    python3 check_import_time.py                      # todos los handlers
+    python3 check_import_time.py lambda_get_pools     # solo algunos
+    python3 check_import_time.py --budget-ms 80 --runs 5
+
+Cada import corre en un proceso nuevo y se toma el mejor de --runs intentos
+para no medir la compilación a bytecode ni el ruido de la máquina. Necesita
+las mismas dependencias que las Lambdas (psycopg2, boto3) instaladas.
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+FUNCTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "functions")
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "150"))
+
+
+def measure(module_name):
+    # En Lambda la región siempre está definida; sin ella boto3 falla al crear clientes
+    env = {"AWS_DEFAULT_REGION": "us-east-1", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=FUNCTIONS_PATH,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else f"exit code {result.returncode}")
+
+    # Formato: "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.strip() == module_name:
+            return int(cumulative) / 1000
+
+    raise RuntimeError(f"{module_name} not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget for the Lambda handlers")
+    parser.add_argument("modules", nargs="*", help="handler modules to measure (default: functions/lambda_*.py)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    modules = args.modules or sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(FUNCTIONS_PATH, "lambda_*.py")))
+
+    failed = []
+    for module_name in modules:
+        try:
+            elapsed_ms = min(measure(module_name) for _ in range(args.runs))
+        except RuntimeError as e:
+            print(f"ERROR {module_name}: {e}")
+            failed.append(module_name)
+            continue
+
+        status = "OK  " if elapsed_ms <= args.budget_ms else "SLOW"
+        print(f"{status} {module_name:40} {elapsed_ms:8.1f} ms")
+        if elapsed_ms > args.budget_ms:
+            failed.append(module_name)
+
+    if failed:
+        print(f"\n{len(failed)} handler(s) over the {args.budget_ms:.0f} ms budget or failing to import: {', '.join(failed)}")
+        return 1
+
+    print(f"\nAll {len(modules)} handlers within the {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,8 +12,16 @@ resource "aws_cognito_user_pool" "this" {
 
   auto_verified_attributes = ["email"]
 
+  # Los claims en el access token requieren el evento V2_0, disponible desde Essentials
+  user_pool_tier = "ESSENTIALS"
+
   lambda_config {
     post_confirmation = aws_lambda_function.cognito_trigger.arn
+
+    pre_token_generation_config {
+      lambda_arn     = aws_lambda_function.pre_token_generation.arn
+      lambda_version = "V2_0"
+    }
   }
 }
 
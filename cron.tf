@@ -1,7 +1,36 @@
 resource "archive_file" "lambda_check_pools_zip" {
   type        = "zip"
-  source_file = "${path.module}/functions/lambda_check_pools.py"
   output_path = "${path.module}/functions/lambda_check_pools.zip"
+
+  source {
+    content  = file("${path.module}/functions/lambda_check_pools.py")
+    filename = "lambda_check_pools.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/__init__.py")
+    filename = "common/__init__.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/db.py")
+    filename = "common/db.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/notifications.py")
+    filename = "common/notifications.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/aws.py")
+    filename = "common/aws.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/sync.py")
+    filename = "common/sync.py"
+  }
 }
 
 resource "aws_lambda_function" "lambda_check_pools" {
@@ -26,6 +55,9 @@ resource "aws_lambda_function" "lambda_check_pools" {
       DB_USER       = var.db_username
       DB_PASSWORD   = var.db_password
       SNS_TOPIC_ARN = aws_sns_topic.pool_notifications.arn
+
+      # "true" para que solo una ejecución a la vez procese pools vencidos
+      CHECK_POOLS_ADVISORY_LOCK = "false"
     }
   }
 
@@ -57,3 +89,162 @@ resource "aws_lambda_permission" "allow_eventbridge" {
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.hourly_check.arn
 }
+
+resource "archive_file" "lambda_drain_outbox_zip" {
+  type        = "zip"
+  output_path = "${path.module}/functions/lambda_drain_outbox.zip"
+
+  source {
+    content  = file("${path.module}/functions/lambda_drain_outbox.py")
+    filename = "lambda_drain_outbox.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/__init__.py")
+    filename = "common/__init__.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/db.py")
+    filename = "common/db.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/notifications.py")
+    filename = "common/notifications.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/aws.py")
+    filename = "common/aws.py"
+  }
+}
+
+resource "aws_lambda_function" "lambda_drain_outbox" {
+  filename         = archive_file.lambda_drain_outbox_zip.output_path
+  function_name    = "drain_outbox"
+  handler          = "lambda_drain_outbox.handler"
+  role             = "arn:aws:iam::${data.aws_caller_identity.current.account_id}:role/LabRole"
+  runtime          = var.lambda_runtime
+  timeout          = 60
+  layers           = [aws_lambda_layer_version.psycopg2.arn]
+  source_code_hash = archive_file.lambda_drain_outbox_zip.output_base64sha256
+
+  vpc_config {
+    subnet_ids         = module.vpc.private_lambda_subnet_ids
+    security_group_ids = [aws_security_group.lambda.id]
+  }
+
+  environment {
+    variables = {
+      DB_HOST       = aws_db_proxy.this.endpoint
+      DB_PORT       = "5432"
+      DB_NAME       = aws_db_instance.this.db_name
+      DB_USER       = var.db_username
+      DB_PASSWORD   = var.db_password
+      SNS_TOPIC_ARN = aws_sns_topic.pool_notifications.arn
+    }
+  }
+
+  depends_on = [
+    aws_db_proxy_target.this
+  ]
+
+  tags = {
+    Name = format("%s-drain-outbox", var.project_name)
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "outbox_drain" {
+  name                = format("%s-outbox-drain", var.project_name)
+  description         = "Publica en SNS las notificaciones pendientes del outbox cada minuto"
+  schedule_expression = "rate(1 minute)"
+}
+
+resource "aws_cloudwatch_event_target" "invoke_lambda_drain_outbox" {
+  rule      = aws_cloudwatch_event_rule.outbox_drain.name
+  target_id = "InvokeLambdaDrainOutbox"
+  arn       = aws_lambda_function.lambda_drain_outbox.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_drain_outbox" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.lambda_drain_outbox.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.outbox_drain.arn
+}
+
+resource "archive_file" "lambda_reconcile_pools_zip" {
+  type        = "zip"
+  output_path = "${path.module}/functions/lambda_reconcile_pools.zip"
+
+  source {
+    content  = file("${path.module}/functions/lambda_reconcile_pools.py")
+    filename = "lambda_reconcile_pools.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/__init__.py")
+    filename = "common/__init__.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/db.py")
+    filename = "common/db.py"
+  }
+}
+
+resource "aws_lambda_function" "lambda_reconcile_pools" {
+  filename         = archive_file.lambda_reconcile_pools_zip.output_path
+  function_name    = "reconcile_pools"
+  handler          = "lambda_reconcile_pools.handler"
+  role             = "arn:aws:iam::${data.aws_caller_identity.current.account_id}:role/LabRole"
+  runtime          = var.lambda_runtime
+  timeout          = 300
+  layers           = [aws_lambda_layer_version.psycopg2.arn]
+  source_code_hash = archive_file.lambda_reconcile_pools_zip.output_base64sha256
+
+  vpc_config {
+    subnet_ids         = module.vpc.private_lambda_subnet_ids
+    security_group_ids = [aws_security_group.lambda.id]
+  }
+
+  environment {
+    variables = {
+      DB_HOST     = aws_db_proxy.this.endpoint
+      DB_PORT     = "5432"
+      DB_NAME     = aws_db_instance.this.db_name
+      DB_USER     = var.db_username
+      DB_PASSWORD = var.db_password
+    }
+  }
+
+  depends_on = [
+    aws_db_proxy_target.this
+  ]
+
+  tags = {
+    Name = format("%s-reconcile-pools", var.project_name)
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "pool_totals_reconcile" {
+  name                = format("%s-pool-totals-reconcile", var.project_name)
+  description         = "Corrige los totales desnormalizados de los pools abiertos una vez por día"
+  schedule_expression = "rate(1 day)"
+}
+
+resource "aws_cloudwatch_event_target" "invoke_lambda_reconcile_pools" {
+  rule      = aws_cloudwatch_event_rule.pool_totals_reconcile.name
+  target_id = "InvokeLambdaReconcilePools"
+  arn       = aws_lambda_function.lambda_reconcile_pools.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_reconcile_pools" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.lambda_reconcile_pools.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.pool_totals_reconcile.arn
+}
@@ -0,0 +1,14 @@
+# Clientes de boto3 creados recién cuando se usan por primera vez y reutilizados
+# entre invocaciones. Importar boto3 y armar el cliente lleva cientos de ms del
+# cold start, y muchas invocaciones (un 400, un 403) nunca llegan a usarlo.
+_clients = {}
+
+
+def get_client(service_name):
+    client = _clients.get(service_name)
+    if client is None:
+        import boto3
+
+        client = boto3.client(service_name)
+        _clients[service_name] = client
+    return client
@@ -0,0 +1,154 @@
+import os
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+db_host = os.environ.get("DB_HOST")
+db_reader_host = os.environ.get("DB_READER_HOST") or db_host
+db_port = os.environ.get("DB_PORT")
+db_name = os.environ.get("DB_NAME")
+db_user = os.environ.get("DB_USER")
+db_password = os.environ.get("DB_PASSWORD")
+
+WRITER = "writer"
+READER = "reader"
+
+# Una conexión viva por endpoint entre invocaciones del mismo contenedor. Solo
+# se hace un "SELECT 1" antes de reutilizarla si estuvo ociosa más de este
+# tiempo, que es cuando el proxy o el NAT pueden haberla cortado.
+IDLE_PING_SECONDS = int(os.environ.get("DB_IDLE_PING_SECONDS", "30"))
+CONNECT_TIMEOUT_SECONDS = int(os.environ.get("DB_CONNECT_TIMEOUT_SECONDS", "5"))
+
+_connections = {}
+_last_used_at = {}
+
+
+def _host_for(role):
+    return db_reader_host if role == READER else db_host
+
+
+def _connect(role, host=None):
+    return psycopg2.connect(
+        host=host or _host_for(role),
+        port=db_port,
+        dbname=db_name,
+        user=db_user,
+        password=db_password,
+        connect_timeout=CONNECT_TIMEOUT_SECONDS,
+    )
+
+
+def _role_of(conn):
+    for role, cached in _connections.items():
+        if cached is conn:
+            return role
+    return None
+
+
+def _discard(conn):
+    role = _role_of(conn)
+    if role is not None:
+        del _connections[role]
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+
+def _is_broken(conn):
+    return conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN
+
+
+def _reset(conn):
+    if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    if conn.autocommit:
+        conn.autocommit = False
+
+
+def _is_alive(conn):
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error as e:
+        print(f"Stale PostgreSQL connection, reconnecting: {e}")
+        return False
+
+
+def _get_connection(role):
+    conn = _connections.get(role)
+    if conn is not None:
+        try:
+            if _is_broken(conn):
+                raise psycopg2.InterfaceError("connection already closed")
+            _reset(conn)
+            if time.monotonic() - _last_used_at.get(role, 0.0) < IDLE_PING_SECONDS or _is_alive(conn):
+                return conn
+        except psycopg2.Error as e:
+            print(f"Discarding PostgreSQL connection: {e}")
+        _discard(conn)
+
+    conn = _connect(role)
+    _connections[role] = conn
+    _last_used_at[role] = time.monotonic()
+    return conn
+
+
+# Los handlers de solo lectura piden readonly=True y van al endpoint lector;
+# si no está configurado o falla, se usa el escritor.
+def get_db_connection(readonly=False):
+    if readonly and db_reader_host != db_host:
+        try:
+            return _get_connection(READER)
+        except psycopg2.Error as e:
+            print(f"Error connecting to PostgreSQL reader, falling back to writer: {e}")
+
+    try:
+        return _get_connection(WRITER)
+
+    except psycopg2.Error as e:
+        print(f"Error connecting to PostgreSQL: {e}")
+        return None
+
+
+# Para lo que tiene que leerse en el primario aunque el handler use el lector.
+# Si conn ya es el escritor se devuelve la misma, sin tocar su transacción; si
+# no, hay que liberar la que devuelve con release_db_connection().
+def get_writer_connection(conn):
+    if _role_of(conn) != READER:
+        return conn
+    return _get_connection(WRITER)
+
+
+# Conexión propia, fuera del cache, para lo que deja estado de sesión (LISTEN)
+# y no puede compartir la del contenedor: detrás de RDS Proxy quedaría fijada
+# (pinning) para todas las rutas. Se cierra con conn.close(), no con
+# release_db_connection().
+def get_dedicated_connection(host=None):
+    try:
+        return _connect(WRITER, host)
+    except psycopg2.Error as e:
+        print(f"Error connecting to PostgreSQL: {e}")
+        return None
+
+
+# Se llama en lugar de conn.close(): descarta cualquier transacción abierta para
+# que la próxima invocación arranque limpia, y si la conexión quedó rota la
+# cierra para que get_db_connection() abra una nueva.
+def release_db_connection(conn):
+    if conn is None:
+        return
+    try:
+        if _is_broken(conn):
+            _discard(conn)
+            return
+        _reset(conn)
+        role = _role_of(conn)
+        if role is not None:
+            _last_used_at[role] = time.monotonic()
+    except psycopg2.Error as e:
+        print(f"Discarding PostgreSQL connection: {e}")
+        _discard(conn)
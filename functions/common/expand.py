@@ -0,0 +1,39 @@
+from common.params import InvalidQueryParam
+
+# Campos del producto que se anidan con ?expand=product. Las consultas tienen
+# que unir product con el alias prod.
+EXPANDED_PRODUCT_COLUMNS = "prod.id, prod.name, prod.description, prod.unit_price, prod.image_url"
+
+EXPANDED_PRODUCT_JSON = """
+    json_build_object(
+        'id', prod.id, 'name', prod.name, 'description', prod.description,
+        'unit_price', prod.unit_price::float8, 'image_url', prod.image_url
+    )
+"""
+
+
+# Devuelve el conjunto de relaciones pedidas en ?expand=a,b; falla si alguna no
+# está en allowed.
+def parse_expand(query_params, allowed):
+    raw = query_params.get("expand")
+    if not raw:
+        return set()
+
+    expand = {part.strip() for part in raw.split(",") if part.strip()}
+    unknown = expand - set(allowed)
+    if unknown:
+        raise InvalidQueryParam(f"Cannot expand {', '.join(sorted(unknown))}; allowed: {', '.join(sorted(allowed))}")
+    return expand
+
+
+# row son las columnas de EXPANDED_PRODUCT_COLUMNS
+def expanded_product(row):
+    if row[0] is None:
+        return None
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "unit_price": float(row[3]) if row[3] is not None else None,
+        "image_url": row[4],
+    }
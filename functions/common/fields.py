@@ -0,0 +1,40 @@
+from common.params import InvalidQueryParam
+
+# Proyección de columnas con ?fields=a,b,c en los listados. Cada handler define
+# sus campos como {nombre: (columna, expresión para json_build_object,
+# conversión en Python o None)}; sólo esos nombres se aceptan.
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+# Devuelve los campos pedidos en el orden en que los define spec (todos si no
+# vino ?fields=); falla si alguno no está permitido.
+def parse_fields(query_params, spec):
+    raw = query_params.get("fields")
+    if raw is None:
+        return list(spec)
+
+    requested = {part.strip() for part in raw.split(",") if part.strip()}
+    unknown = requested - set(spec)
+    if not requested or unknown:
+        raise InvalidQueryParam(f"'fields' must be one or more of: {', '.join(spec)}")
+    return [name for name in spec if name in requested]
+
+
+def select_columns(spec, fields):
+    return ", ".join(spec[name][0] for name in fields)
+
+
+def json_fields(spec, fields):
+    return ", ".join(f"'{name}', {spec[name][1]}" for name in fields)
+
+
+# row empieza con las columnas de select_columns(spec, fields)
+def row_to_dict(spec, fields, row):
+    item = {}
+    for name, value in zip(fields, row):
+        convert = spec[name][2]
+        item[name] = convert(value) if convert and value is not None else value
+    return item
@@ -0,0 +1,120 @@
+import os
+import time
+from collections import OrderedDict
+
+from common.db import get_writer_connection, release_db_connection
+
+# Cache por contenedor de (role, email) por cognito_sub. Los roles casi nunca
+# cambian, así que se evita la consulta a user_role en cada request.
+# Un trigger sobre user_role avanza user_role_version en la misma transacción
+# de cada cambio; cada contenedor la consulta como mucho cada
+# IDENTITY_VERSION_CHECK_SECONDS y, si se movió, descarta todo el cache. Se lee
+# en el escritor: una réplica puede estar atrasada.
+IDENTITY_CACHE_SIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", "1024"))
+IDENTITY_CACHE_TTL_SECONDS = int(os.environ.get("IDENTITY_CACHE_TTL_SECONDS", "300"))
+IDENTITY_VERSION_CHECK_SECONDS = int(os.environ.get("IDENTITY_VERSION_CHECK_SECONDS", "5"))
+
+_cache = OrderedDict()
+_cache_version = None
+_version_checked_at = 0.0
+
+
+def get_claims(event):
+    request_context = event.get("requestContext", {})
+    authorizer = request_context.get("authorizer", {})
+    claims = authorizer.get("claims", {})
+    if not claims:
+        jwt = authorizer.get("jwt", {})
+        claims = jwt.get("claims", {})
+    return claims
+
+
+def get_user_sub_from_token(event):
+    try:
+        return get_claims(event).get("sub")
+    except Exception as e:
+        print(f"Error extracting sub from token: {e}")
+        return None
+
+
+def get_user_email_from_token(event):
+    try:
+        return get_claims(event).get("email")
+    except Exception as e:
+        print(f"Error extracting email from token: {e}")
+        return None
+
+
+def get_user_role_from_token(event):
+    try:
+        return get_claims(event).get("custom:role")
+    except Exception as e:
+        print(f"Error extracting role from token: {e}")
+        return None
+
+
+def _check_version(conn):
+    global _cache_version, _version_checked_at
+
+    now = time.monotonic()
+    if now - _version_checked_at < IDENTITY_VERSION_CHECK_SECONDS:
+        return
+    writer = get_writer_connection(conn)
+    try:
+        with writer.cursor() as cur:
+            cur.execute("SELECT version FROM user_role_version")
+            version = cur.fetchone()[0]
+    finally:
+        if writer is not conn:
+            release_db_connection(writer)
+    if version != _cache_version:
+        _cache.clear()
+        _cache_version = version
+    _version_checked_at = now
+
+
+# Devuelve (role, email) del usuario o (None, None) si todavía no tiene rol.
+# Los usuarios sin rol no se cachean: recién registrados lo eligen enseguida.
+def get_identity(conn, sub):
+    try:
+        _check_version(conn)
+
+        entry = _cache.get(sub)
+        if entry is not None and entry[0] > time.monotonic():
+            _cache.move_to_end(sub)
+            return entry[1]
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT role, email FROM user_role WHERE cognito_sub = %s", (sub,))
+            result = cur.fetchone()
+        if not result:
+            _cache.pop(sub, None)
+            return None, None
+
+        store_identity(sub, result[0], result[1])
+        return result[0], result[1]
+
+    except Exception as e:
+        print(f"Error resolving user identity: {e}")
+        return None, None
+
+
+def store_identity(sub, role, email):
+    _cache[sub] = (time.monotonic() + IDENTITY_CACHE_TTL_SECONDS, (role, email))
+    _cache.move_to_end(sub)
+    while len(_cache) > IDENTITY_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+# El rol llega como claim custom:role (lo agrega lambda_pre_token_generation);
+# solo si el token no lo trae se busca en user_role.
+def check_user_role(conn, sub, required_role, event=None):
+    role = get_user_role_from_token(event) if event else None
+    if role is None:
+        role, _ = get_identity(conn, sub)
+    return role == required_role
+
+
+def get_user_email_from_db(conn, sub):
+    _, email = get_identity(conn, sub)
+    return email
@@ -0,0 +1,49 @@
+import json
+import os
+
+from common.pagination import encode_cursor
+
+# Con SERVER_SIDE_JSON=true los listados piden a Postgres el array JSON ya
+# armado (json_agg) y el handler lo devuelve como texto, sin crear un dict por
+# fila. Los campos y formatos son los mismos que arma el handler en Python.
+SERVER_SIDE_JSON = os.environ.get("SERVER_SIDE_JSON", "false").lower() == "true"
+
+# Órdenes de to_char equivalentes a datetime.isoformat(): sin microsegundos
+# cuando son cero y con el offset como +HH:MM.
+_ISO_FORMAT = "'YYYY-MM-DD\"T\"HH24:MI:SSTZH:TZM'"
+_ISO_FORMAT_US = "'YYYY-MM-DD\"T\"HH24:MI:SS.USTZH:TZM'"
+
+
+def iso_timestamp(column):
+    return f"to_char({column}, CASE WHEN mod(EXTRACT(MICROSECONDS FROM {column})::bigint, 1000000) = 0 THEN {_ISO_FORMAT} ELSE {_ISO_FORMAT_US} END)"
+
+
+# query tiene que devolver una columna item (json) y además created_at e id,
+# que definen el orden (created_at DESC, id DESC, como la paginación). Con
+# ranked también una columna rank (float8), que va primero en el orden (búsquedas por
+# relevancia). Sin limit devuelve el array; con limit, el mismo
+# {"items", "next_cursor"} que page_body, para lo que query ya debe pedir
+# limit + 1 filas.
+def fetch_json_body(cur, query, params, limit=None, ranked=False):
+    order = "q.rank DESC, q.created_at DESC, q.id DESC" if ranked else "q.created_at DESC, q.id DESC"
+    if not limit:
+        cur.execute(
+            f"SELECT COALESCE(json_agg(q.item ORDER BY {order}), '[]')::text FROM ({query}) q",
+            params,
+        )
+        return cur.fetchone()[0]
+
+    cur.execute(
+        f"""
+        SELECT COALESCE(json_agg(q.item ORDER BY q.rn) FILTER (WHERE q.rn <= %s), '[]')::text,
+            COUNT(*) > %s,
+            MIN(q.created_at) FILTER (WHERE q.rn = %s),
+            MIN(q.id) FILTER (WHERE q.rn = %s),
+            {"MIN(q.rank) FILTER (WHERE q.rn = %s)" if ranked else "NULL"}
+        FROM (SELECT q.*, ROW_NUMBER() OVER (ORDER BY {order}) AS rn FROM ({query}) q) q
+        """,
+        [limit, limit, limit, limit, *([limit] if ranked else []), *params],
+    )
+    items, has_more, last_created_at, last_id, last_rank = cur.fetchone()
+    next_cursor = encode_cursor(last_created_at.isoformat(), last_id, last_rank) if has_more else None
+    return f'{{"items": {items}, "next_cursor": {json.dumps(next_cursor)}}}'
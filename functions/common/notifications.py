@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from common.aws import get_client
+
+sns_topic_arn = os.environ.get("SNS_TOPIC_ARN")
+
+# PublishBatch acepta hasta 10 mensajes por llamada
+SNS_BATCH_SIZE = 10
+SNS_MAX_WORKERS = int(os.environ.get("SNS_MAX_WORKERS", "8"))
+
+
+def _publish_batch(sns_client, batch):
+    try:
+        response = sns_client.publish_batch(
+            TopicArn=sns_topic_arn,
+            PublishBatchRequestEntries=[
+                {"Id": str(notification_id), "Subject": subject, "Message": message} for notification_id, subject, message in batch
+            ],
+        )
+        for failed in response.get("Failed", []):
+            print(f"Error publicando notificación {failed['Id']} en SNS: {failed.get('Message')}")
+        return [failed["Id"] for failed in response.get("Failed", [])]
+
+    except Exception as e:
+        print(f"Error publicando lote en SNS: {e}")
+        return [str(notification_id) for notification_id, _, _ in batch]
+
+
+# Publica (id, subject, message) en lotes de PublishBatch enviados en paralelo.
+# Devuelve los ids (como string) que no se pudieron publicar.
+def publish_notifications(notifications):
+    batches = [notifications[i : i + SNS_BATCH_SIZE] for i in range(0, len(notifications), SNS_BATCH_SIZE)]
+    if not batches:
+        return []
+
+    # El cliente se crea acá y no dentro de los threads: crearlo no es thread-safe
+    sns_client = get_client("sns")
+    with ThreadPoolExecutor(max_workers=min(SNS_MAX_WORKERS, len(batches))) as executor:
+        results = list(executor.map(lambda batch: _publish_batch(sns_client, batch), batches))
+
+    return [notification_id for failed in results for notification_id in failed]
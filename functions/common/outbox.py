@@ -0,0 +1,8 @@
+# Notificaciones pendientes que se escriben en la misma transacción que el
+# cambio que las origina; lambda_drain_outbox las publica en SNS después.
+# dedupe_key evita encolar dos veces el mismo aviso.
+def enqueue_notification(cur, dedupe_key, subject, message):
+    cur.execute(
+        "INSERT INTO outbox (dedupe_key, subject, message) VALUES (%s, %s, %s) ON CONFLICT (dedupe_key) DO NOTHING",
+        (dedupe_key, subject, message),
+    )
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidPageParams(ValueError):
+    pass
+
+
+# Devuelve (limit, after), donde after es el (created_at, id) del último ítem
+# recibido, o (created_at, id, rank) si ranked (búsquedas ordenadas por
+# relevancia). Si el cliente no pidió paginar devuelve (None, None) y el
+# handler responde con la lista completa como antes.
+def parse_page_params(query_params, ranked=False):
+    limit = query_params.get("limit")
+    cursor = query_params.get("cursor")
+    if limit is None and cursor is None:
+        return None, None
+
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise InvalidPageParams("'limit' must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidPageParams(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+
+    after = decode_cursor(cursor) if cursor else None
+    # Un cursor de búsqueda no sirve para el listado normal ni al revés
+    if after and (len(after) == 3) != ranked:
+        raise InvalidPageParams("Invalid 'cursor' parameter")
+    return limit, after
+
+
+def encode_cursor(created_at, row_id, rank=None):
+    values = [created_at, row_id] if rank is None else [created_at, row_id, rank]
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id, *rank = json.loads(raw)
+        if len(rank) > 1:
+            raise ValueError("too many cursor values")
+        return (datetime.fromisoformat(created_at), int(row_id), *(float(value) for value in rank))
+    except (ValueError, TypeError) as e:
+        raise InvalidPageParams("Invalid 'cursor' parameter") from e
+
+
+# Condición de keyset para ORDER BY created_at DESC, id DESC.
+def keyset_condition(after, alias=None):
+    prefix = f"{alias}." if alias else ""
+    return f"({prefix}created_at, {prefix}id) < (%s, %s)", list(after)
+
+
+# Condición de keyset para ORDER BY rank DESC, created_at DESC, id DESC, donde
+# rank_sql es la expresión de relevancia (ts_rank). Se compara como float8,
+# igual que el rank que devuelve la consulta para armar el cursor.
+def ranked_keyset_condition(after, rank_sql):
+    created_at, row_id, rank = after
+    return f"({rank_sql}::float8, created_at, id) < (%s::float8, %s, %s)", [rank, created_at, row_id]
+
+
+# Los handlers piden limit + 1 filas para saber si hay otra página. Si los
+# ítems no traen created_at e id (?fields=), cursor_keys tiene las claves de
+# cada fila, armadas con row_cursor_keys.
+def page_body(items, limit, cursor_keys=None):
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        keys = cursor_keys[limit - 1] if cursor_keys is not None else (items[-1]["created_at"], items[-1]["id"])
+        next_cursor = encode_cursor(*keys)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# Las consultas ponen created_at, id (y rank si ranked) al final de cada fila
+def row_cursor_keys(rows, ranked=False):
+    size = 3 if ranked else 2
+    return [(row[-size].isoformat(), *row[-size + 1 :]) for row in rows]
@@ -0,0 +1,93 @@
+import os
+import re
+from datetime import date, datetime, timezone
+
+# Máximo de ids por llamada en los multi-get (?ids=1,2,3)
+MAX_IDS = int(os.environ.get("MAX_IDS_PER_REQUEST", "100"))
+
+
+# Palabras que se toman de ?q= (el resto se ignora)
+MAX_SEARCH_TERMS = 10
+
+_SEARCH_TERM = re.compile(r"[^\W_]+")
+
+
+class InvalidQueryParam(ValueError):
+    pass
+
+
+# Devuelve la lista de ids de ?ids=1,2,3 (sin repetidos, en el orden recibido)
+# o None si no vino el parámetro.
+def parse_ids(query_params, name="ids"):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError:
+        raise InvalidQueryParam(f"'{name}' must be a comma-separated list of integers")
+    if not ids:
+        raise InvalidQueryParam(f"'{name}' must not be empty")
+    if len(ids) > MAX_IDS:
+        raise InvalidQueryParam(f"'{name}' accepts at most {MAX_IDS} ids per request")
+    return ids
+
+
+def parse_int(query_params, name):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise InvalidQueryParam(f"'{name}' must be an integer")
+
+
+def parse_date(query_params, name):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise InvalidQueryParam(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+# Fecha y hora ISO 8601; sin zona horaria se toma como UTC
+def parse_datetime(query_params, name):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError:
+        raise InvalidQueryParam(f"'{name}' must be an ISO 8601 timestamp")
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# ?status=open,success -> ["open", "success"]; cada valor tiene que estar en allowed
+def parse_choices(query_params, name, allowed):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+
+    values = list(dict.fromkeys(part.strip() for part in raw.split(",") if part.strip()))
+    invalid = [value for value in values if value not in allowed]
+    if not values or invalid:
+        raise InvalidQueryParam(f"'{name}' must be one or more of: {', '.join(allowed)}")
+    return values
+
+
+# ?q=sony head -> "sony:* & head:*" para to_tsquery. Sólo se toman letras y
+# números, así que el texto del usuario nunca llega como sintaxis de tsquery;
+# cada palabra matchea por prefijo para que sirva como type-ahead.
+def parse_search_query(query_params, name="q"):
+    raw = query_params.get(name)
+    if raw is None:
+        return None
+
+    terms = _SEARCH_TERM.findall(raw.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise InvalidQueryParam(f"'{name}' must contain at least one letter or number")
+    return " & ".join(f"{term}:*" for term in terms)
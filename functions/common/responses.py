@@ -0,0 +1,114 @@
+import base64
+import gzip
+import hashlib
+import os
+from datetime import timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Por debajo de este tamaño comprimir no ahorra casi nada y cuesta CPU
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+# Devuelve (aceptadas, rechazadas): las que vienen con q=0 el cliente las
+# rechaza explícitamente y no se pueden elegir ni a través de "*".
+def _accepted_encodings(accept_encoding):
+    accepted = set()
+    refused = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if not name:
+            continue
+        if quality > 0:
+            accepted.add(name)
+        else:
+            refused.add(name)
+    return accepted, refused
+
+
+def _choose_encoding(event):
+    headers = event.get("headers") or {}
+    # El HTTP API (payload 2.0) pasa los headers en minúscula
+    accept_encoding = headers.get("accept-encoding") or headers.get("Accept-Encoding") or ""
+    accepted, refused = _accepted_encodings(accept_encoding)
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or ("*" in accepted and "gzip" not in refused):
+        return "gzip"
+    return None
+
+
+# Comprime el body de una respuesta del handler (gzip, o brotli si está
+# instalado) cuando el cliente lo acepta y el body supera COMPRESSION_MIN_BYTES.
+# Las respuestas chicas o de clientes sin Accept-Encoding salen sin tocar.
+def compress_response(event, response):
+    body = response.get("body")
+    if not body or len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = _choose_encoding(event)
+    if encoding is None:
+        return response
+
+    raw = body.encode("utf-8")
+    if encoding == "br":
+        compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+
+    headers = dict(response.get("headers") or {})
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+
+    return {
+        **response,
+        "headers": headers,
+        "body": base64.b64encode(compressed).decode("ascii"),
+        "isBase64Encoded": True,
+    }
+
+
+# ETag a partir de los valores que cambian cuando cambia el recurso
+# (updated_at y lo que haga falta). Los datetime se pasan a UTC para que el
+# ETag no dependa de la zona horaria de la sesión. Es débil (W/) porque el
+# mismo ETag acompaña al body con y sin compress_response, y uno fuerte tiene
+# que distinguir cada Content-Encoding.
+def make_etag(*parts):
+    raw = "|".join(part.astimezone(timezone.utc).isoformat() if hasattr(part, "astimezone") else str(part) for part in parts)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def get_if_none_match(event):
+    headers = event.get("headers") or {}
+    return headers.get("if-none-match") or headers.get("If-None-Match")
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: W/"x" y "x" son el mismo ETag
+    opaque = etag.removeprefix("W/")
+    return opaque in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def not_modified(etag):
+    return {
+        "statusCode": 304,
+        "headers": {"Access-Control-Allow-Origin": "*", "ETag": etag, "Cache-Control": "private, no-cache"},
+    }
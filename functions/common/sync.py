@@ -0,0 +1,44 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+# Sincronización incremental (?updated_since=) de /products y /pools. Los
+# borrados quedan en tombstone durante TOMBSTONE_RETENTION_DAYS (check_pools
+# purga los más viejos); un cliente con un updated_since anterior tiene que
+# volver a pedir el listado completo.
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", "30"))
+
+# updated_at y deleted_at toman el inicio de la transacción que escribe, pero
+# la fila recién se ve cuando esa transacción confirma. Por eso la marca de
+# agua no es now() sino el inicio de la transacción abierta más vieja: lo que
+# todavía no se ve va a tener un updated_at posterior y sale en el próximo
+# pedido. Se calcula antes de leer los cambios. Puede repetir filas, nunca
+# saltearlas. En una réplica no se ven las transacciones del primario, así que
+# estas consultas van al escritor.
+WATERMARK_QUERY = """
+    SELECT LEAST(now(), COALESCE(MIN(xact_start), now()))
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL
+"""
+
+
+def is_expired(updated_since):
+    return updated_since < datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+
+def fetch_watermark(cur):
+    cur.execute(WATERMARK_QUERY)
+    return cur.fetchone()[0]
+
+
+def fetch_deleted_ids(cur, entity, updated_since):
+    cur.execute(
+        "SELECT entity_id FROM tombstone WHERE entity = %s AND deleted_at >= %s ORDER BY entity_id",
+        (entity, updated_since),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+# items_json es el array ya serializado (json.dumps o fetch_json_body)
+def changes_body(items_json, deleted, watermark):
+    return f'{{"items": {items_json}, "deleted": {json.dumps(deleted)}, "watermark": {json.dumps(watermark.isoformat())}}}'
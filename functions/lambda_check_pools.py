@@ -1,42 +1,118 @@
 import json
 import os
 
-import boto3
 import psycopg2
+from psycopg2.extras import execute_values
+
+from common.db import get_db_connection, release_db_connection
+from common.notifications import publish_notifications
+from common.sync import TOMBSTONE_RETENTION_DAYS
+
+# Los pools se procesan de a CHUNK_SIZE, cada tanda en su propia transacción.
+# Si quedan menos de TIME_MARGIN_MS de ejecución se corta y el resto queda para
+# la próxima corrida.
+CHUNK_SIZE = int(os.environ.get("CHECK_POOLS_CHUNK_SIZE", "200"))
+TIME_MARGIN_MS = int(os.environ.get("CHECK_POOLS_TIME_MARGIN_MS", "10000"))
+
+# Con CHECK_POOLS_ADVISORY_LOCK=true solo una ejecución a la vez procesa pools;
+# las demás terminan sin hacer nada. Por defecto varias ejecuciones pueden
+# repartirse el trabajo gracias al SKIP LOCKED de EXPIRED_POOLS_QUERY.
+ADVISORY_LOCK_ENABLED = os.environ.get("CHECK_POOLS_ADVISORY_LOCK", "false").lower() == "true"
+ADVISORY_LOCK_KEY = "check_pools"
+
+# Reclama una tanda de pools vencidos con FOR UPDATE SKIP LOCKED, así dos
+# ejecuciones superpuestas nunca toman el mismo pool, y trae el nombre del
+# producto y la lista de participantes ya armada en la misma consulta. Como ya
+# se leen los request del pool, el total sale exacto de ahí y se corrige en
+# pool al cerrarlo.
+EXPIRED_POOLS_QUERY = """
+    WITH claimed AS (
+        SELECT id
+        FROM pool
+        WHERE end_at <= NOW() AND status = 'open'
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    SELECT p.id, p.min_quantity, COALESCE(SUM(r.quantity), 0), COUNT(r.id), pr.name,
+        COALESCE(string_agg(r.email || ' (' || r.quantity || 'u)', ', ' ORDER BY r.id), '')
+    FROM claimed c
+    JOIN pool p ON p.id = c.id
+    JOIN product pr ON p.product_id = pr.id
+    LEFT JOIN request r ON r.pool_id = p.id
+    GROUP BY p.id, pr.name
+    ORDER BY p.id
+"""
+
+
+def build_notification(pool_id, min_quantity, total_joined, product_name, participants):
+    if total_joined >= min_quantity:
+        final_status = "success"
+        subject = f"ÉXITO: El pool para '{product_name}' se completó!"
+        message_body = (
+            f"¡Buenas noticias!\n\n"
+            f"El pool de compra para '{product_name}' (ID: {pool_id}) ha finalizado exitosamente.\n\n"
+            f"- Mínimo Requerido: {min_quantity} unidades\n"
+            f"- Total Alcanzado: {total_joined} unidades\n\n"
+            f"La compra se procesará. Gracias por participar.\n"
+            f"Participantes: {participants}"
+        )
+    else:
+        final_status = "failed"
+        subject = f"FALLIDO: El pool para '{product_name}' no alcanzó el mínimo"
+        message_body = (
+            f"Notificación de Pool (ID: {pool_id})\n\n"
+            f"El pool de compra para '{product_name}' ha vencido sin alcanzar el mínimo requerido.\n\n"
+            f"- Mínimo Requerido: {min_quantity} unidades\n"
+            f"- Total Alcanzado: {total_joined} unidades\n\n"
+            f"La compra no será ejecutada.\n"
+            f"Participantes: {participants}"
+        )
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-sns_topic_arn = os.environ.get("SNS_TOPIC_ARN")
+    return final_status, subject, message_body
 
-sns_client = boto3.client("sns")
 
+# Cierra una tanda de pools vencidos y hace commit antes de devolver las
+# notificaciones: si después falla el envío, el pool no se vuelve a notificar.
+def close_expired_chunk(conn):
+    with conn.cursor() as cur:
+        cur.execute(EXPIRED_POOLS_QUERY, (CHUNK_SIZE,))
+        expired_pools = cur.fetchall()
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+        notifications = []
+        status_updates = []
+        for pool_id, min_quantity, total_joined, participant_count, product_name, participants in expired_pools:
+            final_status, subject, message_body = build_notification(pool_id, min_quantity, total_joined, product_name, participants)
+            notifications.append((pool_id, subject, message_body))
+            status_updates.append((pool_id, final_status, total_joined, participant_count))
 
+        if status_updates:
+            execute_values(
+                cur,
+                """
+                UPDATE pool p
+                SET status = v.status, joined_quantity = v.joined_quantity, participant_count = v.participant_count
+                FROM (VALUES %s) AS v(id, status, joined_quantity, participant_count)
+                WHERE p.id = v.id AND p.status = 'open'
+                """,
+                status_updates,
+                page_size=len(status_updates),
+            )
 
-def get_product_name(cur, product_id):
-    cur.execute("SELECT name FROM product WHERE id = %s", (product_id,))
-    return cur.fetchone()[0]
+    conn.commit()
+    return notifications
 
 
-def get_pool_participants(cur, pool_id):
-    cur.execute("SELECT email, quantity FROM request WHERE pool_id = %s", (pool_id,))
-    return cur.fetchall()
+# El advisory lock es de sesión y la conexión se reutiliza entre invocaciones,
+# así que hay que liberarlo explícitamente.
+def release_advisory_lock(conn):
+    try:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (ADVISORY_LOCK_KEY,))
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"Error liberando el advisory lock: {e}")
 
 
 def handler(event, context):
@@ -46,74 +122,51 @@ def handler(event, context):
         print("Error: No se pudo conectar a la DB")
         return
 
+    processed = 0
+    locked = False
     try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, product_id, min_quantity
-                FROM pool
-                WHERE end_at <= NOW() AND status = 'open'
-                """,
-            )
-            expired_pools = cur.fetchall()
-            print(f"Pools vencidos encontrados: {len(expired_pools)}")
-
-            for pool in expired_pools:
-                pool_id, product_id, min_quantity = pool
-
-                cur.execute(
-                    "SELECT COALESCE(SUM(quantity), 0) FROM request WHERE pool_id = %s",
-                    (pool_id,),
-                )
-                total_joined = cur.fetchone()[0]
-
-                product_name = get_product_name(cur, product_id)
-                participants = get_pool_participants(cur, pool_id)
-                participant_list = [f"{email} ({qty}u)" for email, qty in participants]
-
-                final_status = ""
-                subject = ""
-                message_body = ""
-
-                if total_joined >= min_quantity:
-                    final_status = "success"
-                    subject = f"ÉXITO: El pool para '{product_name}' se completó!"
-                    message_body = (
-                        f"¡Buenas noticias!\n\n"
-                        f"El pool de compra para '{product_name}' (ID: {pool_id}) ha finalizado exitosamente.\n\n"
-                        f"- Mínimo Requerido: {min_quantity} unidades\n"
-                        f"- Total Alcanzado: {total_joined} unidades\n\n"
-                        f"La compra se procesará. Gracias por participar.\n"
-                        f"Participantes: {', '.join(participant_list)}"
-                    )
-                else:
-                    final_status = "failed"
-                    subject = f"FALLIDO: El pool para '{product_name}' no alcanzó el mínimo"
-                    message_body = (
-                        f"Notificación de Pool (ID: {pool_id})\n\n"
-                        f"El pool de compra para '{product_name}' ha vencido sin alcanzar el mínimo requerido.\n\n"
-                        f"- Mínimo Requerido: {min_quantity} unidades\n"
-                        f"- Total Alcanzado: {total_joined} unidades\n\n"
-                        f"La compra no será ejecutada.\n"
-                        f"Participantes: {', '.join(participant_list)}"
-                    )
-
-                print(f"Publicando en SNS para Pool ID {pool_id}: {subject}")
-                sns_client.publish(TopicArn=sns_topic_arn, Message=message_body, Subject=subject)
-
-                cur.execute(
-                    "UPDATE pool SET status = %s WHERE id = %s",
-                    (final_status, pool_id),
-                )
-
+        if ADVISORY_LOCK_ENABLED:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (ADVISORY_LOCK_KEY,))
+                locked = cur.fetchone()[0]
             conn.commit()
-            print(f"Procesamiento finalizado. {len(expired_pools)} pools actualizados.")
+            if not locked:
+                print("Otra ejecución de check_pools está en curso. No se procesa nada.")
+                return {"statusCode": 200, "body": json.dumps("OK")}
+
+        finished = False
+        while True:
+            if context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+                print("Tiempo de ejecución casi agotado, los pools restantes quedan para la próxima corrida.")
+                break
+
+            notifications = close_expired_chunk(conn)
+            if notifications:
+                print(f"Publicando en SNS {len(notifications)} notificaciones de pools vencidos")
+                failed = publish_notifications(notifications)
+                if failed:
+                    print(f"No se pudieron notificar los pools: {', '.join(failed)}")
+                processed += len(notifications)
+
+            if len(notifications) < CHUNK_SIZE:
+                finished = True
+                break
+
+        # La reconciliación de totales no va acá sino en lambda_reconcile_pools,
+        # una vez por día
+        if finished:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM tombstone WHERE deleted_at < NOW() - %s * INTERVAL '1 day'", (TOMBSTONE_RETENTION_DAYS,))
+            conn.commit()
+
+        print(f"Procesamiento finalizado. {processed} pools actualizados.")
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error en el handler: {e}")
         conn.rollback()
     finally:
-        if conn:
-            conn.close()
+        if locked:
+            release_advisory_lock(conn)
+        release_db_connection(conn)
 
     return {"statusCode": 200, "body": json.dumps("OK")}
@@ -1,9 +1,8 @@
 import json
 import os
 
-import boto3
+from common.aws import get_client
 
-sns_client = boto3.client("sns")
 TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN")
 
 
@@ -17,7 +16,7 @@ def handler(event, context):
         if email and TOPIC_ARN:
             print(f"Suscribiendo {email} al tópico {TOPIC_ARN}")
 
-            sns_client.subscribe(TopicArn=TOPIC_ARN, Protocol="email", Endpoint=email)
+            get_client("sns").subscribe(TopicArn=TOPIC_ARN, Protocol="email", Endpoint=email)
             print("Suscripción solicitada exitosamente.")
         else:
             print("No se encontró email o ARN del tópico.")
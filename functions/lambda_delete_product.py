@@ -1,13 +1,8 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
+from common.db import get_db_connection, release_db_connection
 
 HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -16,21 +11,6 @@ HEADERS = {
 }
 
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
-
-
 def handler(event, context):
     conn = get_db_connection()
     if conn is None:
@@ -75,5 +55,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,83 @@
+import json
+import os
+
+import psycopg2
+
+from common.db import get_db_connection, release_db_connection
+from common.notifications import publish_notifications
+
+BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "10"))
+TIME_MARGIN_MS = int(os.environ.get("OUTBOX_TIME_MARGIN_MS", "10000"))
+RETENTION_DAYS = int(os.environ.get("OUTBOX_RETENTION_DAYS", "7"))
+
+
+# Reclama un lote de notificaciones pendientes con SKIP LOCKED (dos ejecuciones
+# superpuestas no toman las mismas filas), las publica y marca el resultado en
+# la misma transacción. Las que fallan se reintentan con backoff exponencial.
+def drain_batch(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT id, subject, message
+            FROM outbox
+            WHERE sent_at IS NULL AND next_attempt_at <= NOW() AND attempts < %s
+            ORDER BY next_attempt_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (MAX_ATTEMPTS, BATCH_SIZE),
+        )
+        pending = cur.fetchall()
+        if not pending:
+            conn.commit()
+            return 0
+
+        failed_ids = {int(notification_id) for notification_id in publish_notifications(pending)}
+        sent_ids = [notification_id for notification_id, _, _ in pending if notification_id not in failed_ids]
+
+        if sent_ids:
+            cur.execute("UPDATE outbox SET sent_at = NOW(), attempts = attempts + 1 WHERE id = ANY(%s)", (sent_ids,))
+        if failed_ids:
+            cur.execute(
+                """
+                UPDATE outbox
+                SET attempts = attempts + 1,
+                    next_attempt_at = NOW() + LEAST(POWER(2, attempts), 64) * INTERVAL '30 seconds'
+                WHERE id = ANY(%s)
+                """,
+                (list(failed_ids),),
+            )
+            print(f"{len(failed_ids)} notificaciones quedaron para reintentar")
+
+    conn.commit()
+    return len(pending)
+
+
+def handler(event, context):
+    conn = get_db_connection()
+    if conn is None:
+        print("Error: No se pudo conectar a la DB")
+        return
+
+    drained = 0
+    try:
+        while context.get_remaining_time_in_millis() >= TIME_MARGIN_MS:
+            claimed = drain_batch(conn)
+            drained += claimed
+            if claimed < BATCH_SIZE:
+                break
+
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM outbox WHERE sent_at < NOW() - %s * INTERVAL '1 day'", (RETENTION_DAYS,))
+        conn.commit()
+
+        print(f"Outbox procesado. {drained} notificaciones reclamadas.")
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error en el handler: {e}")
+        conn.rollback()
+    finally:
+        release_db_connection(conn)
+
+    return {"statusCode": 200, "body": json.dumps("OK")}
@@ -1,93 +1,44 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
-
-
-def get_user_sub_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-
-        sub = claims.get("sub")
-        if sub:
-            return sub
-
-        return None
-    except Exception as e:
-        print(f"Error extracting sub from token: {e}")
-        return None
-
-
-def get_user_email_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-        return claims.get("email")
-    except Exception as e:
-        print(f"Error extracting email from token: {e}")
-        return None
-
-
-def check_user_role(conn, sub, required_role):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT role FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0] == required_role
-            return False
-    except Exception as e:
-        print(f"Error checking user role: {e}")
-        return False
-
-
-def get_user_email_from_db(conn, sub):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT email FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0]
-            return None
-    except Exception as e:
-        print(f"Error getting user email: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
+from common.identity import get_user_sub_from_token, get_user_email_from_token, check_user_role, get_user_email_from_db
+
+# Una sola pasada sobre request: se agrega por pool (para saber cuáles llegaron
+# al mínimo) y sobre ese resultado se calculan todas las métricas.
+OVERVIEW_QUERY = """
+    WITH company_pool AS (
+        SELECT p.id, p.status, p.min_quantity, pr.unit_price
+        FROM pool p
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %(email)s
+    ),
+    company_request AS MATERIALIZED (
+        SELECT r.pool_id, r.email, r.quantity
+        FROM request r
+        JOIN company_pool cp ON r.pool_id = cp.id
+    ),
+    pool_total AS (
+        SELECT cp.id, cp.status, cp.min_quantity, cp.unit_price, COALESCE(SUM(cr.quantity), 0) AS joined
+        FROM company_pool cp
+        LEFT JOIN company_request cr ON cr.pool_id = cp.id
+        GROUP BY cp.id, cp.status, cp.min_quantity, cp.unit_price
+    )
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE pt.status = 'open'),
+        COUNT(*) FILTER (WHERE pt.joined >= pt.min_quantity),
+        COALESCE(SUM(pt.joined * pt.unit_price), 0),
+        (SELECT COUNT(DISTINCT cr.email) FROM company_request cr),
+        (SELECT COUNT(*) FROM product WHERE email = %(email)s),
+        COALESCE(SUM(pt.joined), 0)
+    FROM pool_total pt
+"""
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     if conn is None:
         return {
             "statusCode": 500,
@@ -104,7 +55,7 @@ def handler(event, context):
                 "body": json.dumps({"error": "Unauthorized - no user ID found in token"}),
             }
 
-        if not check_user_role(conn, sub, "company"):
+        if not check_user_role(conn, sub, "company", event):
             return {
                 "statusCode": 403,
                 "headers": {"Access-Control-Allow-Origin": "*"},
@@ -123,82 +74,18 @@ def handler(event, context):
             }
 
         with conn.cursor() as cur:
-            overview_metrics = {}
-
-            cur.execute(
-                """
-                SELECT COUNT(*)
-                FROM pool p
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s
-                """,
-                (user_email,)
-            )
-            overview_metrics["total_pools"] = cur.fetchone()[0]
-
-            cur.execute(
-                """
-                SELECT COUNT(*)
-                FROM pool p
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s AND p.status = 'open'
-                """,
-                (user_email,)
-            )
-            overview_metrics["active_pools"] = cur.fetchone()[0]
-
-            cur.execute(
-                """
-                SELECT COUNT(DISTINCT p.id)
-                FROM pool p
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s
-                AND (SELECT COALESCE(SUM(r.quantity), 0)
-                     FROM request r
-                     WHERE r.pool_id = p.id) >= p.min_quantity
-                """,
-                (user_email,)
-            )
-            overview_metrics["successful_pools"] = cur.fetchone()[0]
-
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(r.quantity * pr.unit_price), 0)
-                FROM request r
-                JOIN pool p ON r.pool_id = p.id
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s
-                """,
-                (user_email,)
-            )
-            overview_metrics["total_revenue"] = float(cur.fetchone()[0])
-
-            cur.execute(
-                """
-                SELECT COUNT(DISTINCT r.email)
-                FROM request r
-                JOIN pool p ON r.pool_id = p.id
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s
-                """,
-                (user_email,)
-            )
-            overview_metrics["total_customers"] = cur.fetchone()[0]
-
-            cur.execute("SELECT COUNT(*) FROM product WHERE email = %s", (user_email,))
-            overview_metrics["total_products"] = cur.fetchone()[0]
-
-            cur.execute(
-                """
-                SELECT COALESCE(SUM(r.quantity), 0)
-                FROM request r
-                JOIN pool p ON r.pool_id = p.id
-                JOIN product pr ON p.product_id = pr.id
-                WHERE pr.email = %s
-                """,
-                (user_email,)
-            )
-            overview_metrics["total_quantity_sold"] = int(cur.fetchone()[0])
+            cur.execute(OVERVIEW_QUERY, {"email": user_email})
+            row = cur.fetchone()
+
+            overview_metrics = {
+                "total_pools": row[0],
+                "active_pools": row[1],
+                "successful_pools": row[2],
+                "total_revenue": float(row[3]),
+                "total_customers": row[4],
+                "total_products": row[5],
+                "total_quantity_sold": int(row[6]),
+            }
 
             if overview_metrics["total_pools"] > 0:
                 overview_metrics["success_rate"] = round(
@@ -227,5 +114,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
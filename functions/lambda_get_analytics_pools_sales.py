@@ -1,93 +1,36 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
-
-
-def get_user_sub_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-
-        sub = claims.get("sub")
-        if sub:
-            return sub
-
-        return None
-    except Exception as e:
-        print(f"Error extracting sub from token: {e}")
-        return None
-
-
-def get_user_email_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-        return claims.get("email")
-    except Exception as e:
-        print(f"Error extracting email from token: {e}")
-        return None
-
-
-def check_user_role(conn, sub, required_role):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT role FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0] == required_role
-            return False
-    except Exception as e:
-        print(f"Error checking user role: {e}")
-        return False
-
-
-def get_user_email_from_db(conn, sub):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT email FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0]
-            return None
-    except Exception as e:
-        print(f"Error getting user email: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
+from common.identity import get_user_sub_from_token, get_user_email_from_token, check_user_role, get_user_email_from_db
+from common.json_sql import SERVER_SIDE_JSON, fetch_json_body
+from common.responses import compress_response
+
+POOL_SALES_JSON_QUERY = """
+    SELECT
+        json_build_object(
+            'pool_id', p.id,
+            'product_name', pr.name,
+            'unit_price', COALESCE(pr.unit_price::float8, 0),
+            'min_quantity', p.min_quantity,
+            'start_at', p.start_at,
+            'end_at', p.end_at,
+            'total_quantity_sold', p.joined_quantity,
+            'total_participants', p.participant_count,
+            'total_revenue', COALESCE((p.joined_quantity * pr.unit_price)::float8, 0),
+            'reached_min_quantity', p.joined_quantity >= p.min_quantity
+        ) AS item,
+        p.created_at,
+        p.id
+    FROM pool p
+    JOIN product pr ON p.product_id = pr.id
+    WHERE pr.email = %s
+"""
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     if conn is None:
         return {
             "statusCode": 500,
@@ -104,7 +47,7 @@ def handler(event, context):
                 "body": json.dumps({"error": "Unauthorized - no user ID found in token"}),
             }
 
-        if not check_user_role(conn, sub, "company"):
+        if not check_user_role(conn, sub, "company", event):
             return {
                 "statusCode": 403,
                 "headers": {"Access-Control-Allow-Origin": "*"},
@@ -123,6 +66,14 @@ def handler(event, context):
             }
 
         with conn.cursor() as cur:
+            if SERVER_SIDE_JSON:
+                response = {
+                    "statusCode": 200,
+                    "headers": {"Access-Control-Allow-Origin": "*"},
+                    "body": fetch_json_body(cur, POOL_SALES_JSON_QUERY, [user_email]),
+                }
+                return compress_response(event, response)
+
             cur.execute(
                 """
                 SELECT
@@ -132,18 +83,13 @@ def handler(event, context):
                     p.min_quantity,
                     p.start_at,
                     p.end_at,
-                    COALESCE(SUM(r.quantity), 0) as total_quantity_sold,
-                    COUNT(DISTINCT r.email) as total_participants,
-                    COALESCE(SUM(r.quantity), 0) * pr.unit_price as total_revenue,
-                    CASE
-                        WHEN COALESCE(SUM(r.quantity), 0) >= p.min_quantity THEN true
-                        ELSE false
-                    END as reached_min_quantity
+                    p.joined_quantity as total_quantity_sold,
+                    p.participant_count as total_participants,
+                    p.joined_quantity * pr.unit_price as total_revenue,
+                    p.joined_quantity >= p.min_quantity as reached_min_quantity
                 FROM pool p
                 JOIN product pr ON p.product_id = pr.id
-                LEFT JOIN request r ON p.id = r.pool_id
                 WHERE pr.email = %s
-                GROUP BY p.id, pr.name, pr.unit_price, p.min_quantity, p.start_at, p.end_at
                 ORDER BY p.created_at DESC
                 """,
                 (user_email,)
@@ -167,11 +113,12 @@ def handler(event, context):
                     }
                 )
 
-            return {
+            response = {
                 "statusCode": 200,
                 "headers": {"Access-Control-Allow-Origin": "*"},
                 "body": json.dumps(pool_sales),
             }
+            return compress_response(event, response)
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error executing query: {e}")
@@ -186,5 +133,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
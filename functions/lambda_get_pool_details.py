@@ -1,33 +1,15 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
+from common.expand import EXPANDED_PRODUCT_COLUMNS, expanded_product, parse_expand
+from common.params import InvalidQueryParam
+from common.responses import compress_response, etag_matches, get_if_none_match, make_etag, not_modified
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     if conn is None:
         return {
             "statusCode": 500,
@@ -36,9 +18,36 @@ def handler(event, context):
 
     try:
         pool_id = event["pathParameters"]["id"]
+        if_none_match = get_if_none_match(event)
+
+        try:
+            expand_product = "product" in parse_expand(event.get("queryStringParameters") or {}, ["product"])
+        except InvalidQueryParam as e:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": str(e)}),
+            }
+
+        # Con el producto expandido, el ETag también cambia cuando cambia el producto
+        version_columns = "p.id, p.updated_at, p.joined_quantity"
+        product_columns = ""
+        product_join = ""
+        if expand_product:
+            version_columns += ", prod.updated_at"
+            product_columns = f", {EXPANDED_PRODUCT_COLUMNS}, prod.updated_at"
+            product_join = "JOIN product prod ON p.product_id = prod.id"
+
         with conn.cursor() as cur:
+            # Visita repetida: alcanza con la versión para responder 304
+            if if_none_match:
+                cur.execute(f"SELECT {version_columns} FROM pool p {product_join} WHERE p.id = %s", (pool_id,))
+                version = cur.fetchone()
+                if version and etag_matches(if_none_match, make_etag(*version)):
+                    return not_modified(make_etag(*version))
+
             cur.execute(
-                """
+                f"""
                 SELECT
                     p.id,
                     p.product_id,
@@ -48,11 +57,10 @@ def handler(event, context):
                     p.created_at,
                     p.updated_at,
                     p.status,
-                    COALESCE(SUM(r.quantity), 0) as joined
+                    p.joined_quantity{product_columns}
                 FROM pool p
-                LEFT JOIN request r ON p.id = r.pool_id
+                {product_join}
                 WHERE p.id = %s
-                GROUP BY p.id, p.product_id, p.start_at, p.end_at, p.min_quantity, p.created_at, p.updated_at
             """,
                 (pool_id,),
             )
@@ -68,14 +76,23 @@ def handler(event, context):
                     "created_at": pool[5].isoformat(),
                     "updated_at": pool[6].isoformat(),
                     "status": pool[7],
-                    "joined": int(pool[8]),
+                    "joined": pool[8],
                 }
+                etag = make_etag(pool[0], pool[6], pool[8])
+                if expand_product:
+                    pool_details["product"] = expanded_product(pool[9:14])
+                    etag = make_etag(pool[0], pool[6], pool[8], pool[14])
 
-                return {
+                response = {
                     "statusCode": 200,
-                    "headers": {"Access-Control-Allow-Origin": "*"},
+                    "headers": {
+                        "Access-Control-Allow-Origin": "*",
+                        "ETag": etag,
+                        "Cache-Control": "private, no-cache",
+                    },
                     "body": json.dumps(pool_details),
                 }
+                return compress_response(event, response)
 
             else:
                 return {
@@ -96,5 +113,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,164 @@
+import json
+import os
+import select
+import time
+
+import psycopg2
+
+from common.db import get_db_connection, get_dedicated_connection, release_db_connection
+from common.params import InvalidQueryParam, parse_int
+
+# Long-poll del avance de un pool: con ?version=N responde apenas pool.version
+# supera N y, si no, espera el NOTIFY de bump_pool_version (canal
+# pool_progress_<id>) hasta PROGRESS_MAX_WAIT_SECONDS. Al vencer responde el
+# estado actual con la misma versión y el cliente vuelve a pedir. Sin version
+# responde en el momento. El HTTP API corta a los 30 s, igual que la Lambda.
+PROGRESS_MAX_WAIT_SECONDS = int(os.environ.get("PROGRESS_MAX_WAIT_SECONDS", "20"))
+TIME_MARGIN_MS = int(os.environ.get("PROGRESS_TIME_MARGIN_MS", "2000"))
+
+# LISTEN va directo a la instancia (sin RDS Proxy) si está configurado
+DB_LISTEN_HOST = os.environ.get("DB_LISTEN_HOST")
+
+# Si no hay lugar para la conexión propia se responde el estado actual por la
+# conexión compartida, sin esperar, y se le pide al cliente que vuelva a
+# preguntar en estos segundos.
+PROGRESS_RETRY_AFTER_SECONDS = int(os.environ.get("PROGRESS_RETRY_AFTER_SECONDS", "5"))
+
+HEADERS = {"Access-Control-Allow-Origin": "*", "Cache-Control": "no-store"}
+
+
+def fetch_progress(cur, pool_id):
+    cur.execute(
+        "SELECT id, version, status, min_quantity, joined_quantity, participant_count, end_at, updated_at FROM pool WHERE id = %s",
+        (pool_id,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {
+        "id": row[0],
+        "version": row[1],
+        "status": row[2],
+        "min_quantity": row[3],
+        "joined": row[4],
+        "participants": row[5],
+        "end_at": row[6].isoformat(),
+        "updated_at": row[7].isoformat(),
+    }
+
+
+# True si llegó alguna notificación antes de timeout segundos
+def wait_for_notify(conn, timeout):
+    if select.select([conn], [], [], timeout) == ([], [], []):
+        return False
+    conn.poll()
+    notified = bool(conn.notifies)
+    conn.notifies.clear()
+    return notified
+
+
+def progress_response(progress, retry_after=None):
+    if progress is None:
+        return {
+            "statusCode": 404,
+            "headers": HEADERS,
+            "body": json.dumps({"error": "Pool not found"}),
+        }
+
+    headers = HEADERS
+    if retry_after is not None:
+        progress = {**progress, "retry_after": retry_after}
+        headers = {**HEADERS, "Retry-After": str(retry_after)}
+    return {
+        "statusCode": 200,
+        "headers": headers,
+        "body": json.dumps(progress),
+    }
+
+
+# Lectura única por la conexión compartida del contenedor (a través del proxy)
+def read_progress_once(pool_id):
+    conn = get_db_connection()
+    if conn is None:
+        return {
+            "statusCode": 500,
+            "headers": HEADERS,
+            "body": json.dumps({"error": "Could not connect to the database"}),
+        }
+
+    try:
+        with conn.cursor() as cur:
+            return progress_response(fetch_progress(cur, pool_id), PROGRESS_RETRY_AFTER_SECONDS)
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error executing query: {e}")
+        return {
+            "statusCode": 500,
+            "headers": HEADERS,
+            "body": json.dumps(
+                {
+                    "error": "An error occurred",
+                    "details": str(e),
+                }
+            ),
+        }
+
+    finally:
+        release_db_connection(conn)
+
+
+def handler(event, context):
+    try:
+        pool_id = int(event["pathParameters"]["id"])
+        query_params = event.get("queryStringParameters") or {}
+        version = parse_int(query_params, "version")
+        wait = parse_int(query_params, "wait")
+    except (ValueError, InvalidQueryParam) as e:
+        return {
+            "statusCode": 400,
+            "headers": HEADERS,
+            "body": json.dumps({"error": str(e) if isinstance(e, InvalidQueryParam) else "Invalid pool id"}),
+        }
+
+    wait = PROGRESS_MAX_WAIT_SECONDS if wait is None else max(0, min(wait, PROGRESS_MAX_WAIT_SECONDS))
+    wait = min(wait, max(0, (context.get_remaining_time_in_millis() - TIME_MARGIN_MS) / 1000))
+    deadline = time.monotonic() + wait
+
+    # Conexión sólo para este pedido: el LISTEN no se puede hacer en la
+    # compartida del contenedor (common.db), que usan las demás rutas.
+    conn = get_dedicated_connection(DB_LISTEN_HOST)
+    if conn is None:
+        return read_progress_once(pool_id)
+
+    try:
+        # Sin autocommit el LISTEN no tiene efecto hasta el COMMIT
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            # Primero LISTEN y después la lectura: un cambio entre las dos no se pierde
+            cur.execute(f"LISTEN pool_progress_{pool_id}")
+            progress = fetch_progress(cur, pool_id)
+
+            while progress is not None and version is not None and progress["version"] <= version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if wait_for_notify(conn, remaining):
+                    progress = fetch_progress(cur, pool_id)
+
+        return progress_response(progress)
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error executing query: {e}")
+        return {
+            "statusCode": 500,
+            "headers": HEADERS,
+            "body": json.dumps(
+                {
+                    "error": "An error occurred",
+                    "details": str(e),
+                }
+            ),
+        }
+
+    finally:
+        conn.close()
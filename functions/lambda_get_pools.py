@@ -1,33 +1,57 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
+from common.db import get_db_connection, release_db_connection
+from common.expand import EXPANDED_PRODUCT_COLUMNS, EXPANDED_PRODUCT_JSON, expanded_product, parse_expand
+from common.fields import isoformat, json_fields, parse_fields, row_to_dict, select_columns
+from common.json_sql import SERVER_SIDE_JSON, fetch_json_body, iso_timestamp
+from common.pagination import InvalidPageParams, keyset_condition, page_body, parse_page_params, row_cursor_keys
+from common.params import InvalidQueryParam, parse_choices, parse_date, parse_datetime, parse_ids, parse_int
+from common.responses import compress_response
+from common.sync import TOMBSTONE_RETENTION_DAYS, changes_body, fetch_deleted_ids, fetch_watermark, is_expired
 
+POOL_STATUSES = ["open", "success", "failed"]
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
+# Campos que se pueden pedir con ?fields=
+POOL_FIELDS = {
+    "id": ("p.id", "p.id", None),
+    "product_id": ("p.product_id", "p.product_id", None),
+    "start_at": ("p.start_at", "p.start_at", isoformat),
+    "end_at": ("p.end_at", "p.end_at", isoformat),
+    "min_quantity": ("p.min_quantity", "p.min_quantity", None),
+    "created_at": ("p.created_at", iso_timestamp("p.created_at"), isoformat),
+    "updated_at": ("p.updated_at", iso_timestamp("p.updated_at"), isoformat),
+    "status": ("p.status", "p.status", None),
+    "joined": ("p.joined_quantity", "p.joined_quantity", None),
+}
+
+
+# p.created_at y p.id van al final aunque no se pidan: los usa el cursor
+def pool_select(fields, expand_product):
+    if SERVER_SIDE_JSON:
+        json_object = json_fields(POOL_FIELDS, fields)
+        if expand_product:
+            json_object += f", 'product', {EXPANDED_PRODUCT_JSON}"
+        return f"json_build_object({json_object}) AS item, p.created_at, p.id"
 
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+    columns = select_columns(POOL_FIELDS, fields)
+    if expand_product:
+        columns += f", {EXPANDED_PRODUCT_COLUMNS}"
+    return f"{columns}, p.created_at, p.id"
+
+
+def pool_from_row(row, fields, expand_product):
+    pool = row_to_dict(POOL_FIELDS, fields, row)
+    if expand_product:
+        pool["product"] = expanded_product(row[len(fields) : len(fields) + 5])
+    return pool
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    query_params = event.get("queryStringParameters") or {}
+    # Las consultas incrementales van al escritor (ver common/sync.py)
+    conn = get_db_connection(readonly="updated_since" not in query_params)
     if conn is None:
         return {
             "statusCode": 500,
@@ -35,57 +59,101 @@ def handler(event, context):
         }
 
     try:
-        email_filter = None
-        if event.get("queryStringParameters"):
-            email_filter = event["queryStringParameters"].get("email")
+        email_filter = query_params.get("email")
+
+        try:
+            limit, after = parse_page_params(query_params)
+            ids = parse_ids(query_params)
+            expand_product = "product" in parse_expand(query_params, ["product"])
+            product_id = parse_int(query_params, "product_id")
+            statuses = parse_choices(query_params, "status", POOL_STATUSES)
+            ending_before = parse_date(query_params, "ending_before")
+            ending_after = parse_date(query_params, "ending_after")
+            fields = parse_fields(query_params, POOL_FIELDS)
+            updated_since = parse_datetime(query_params, "updated_since")
+            if updated_since and limit:
+                raise InvalidQueryParam("'updated_since' cannot be combined with 'limit' or 'cursor'")
+        except (InvalidPageParams, InvalidQueryParam) as e:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": str(e)}),
+            }
+
+        if updated_since and is_expired(updated_since):
+            return {
+                "statusCode": 410,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps(
+                    {"error": f"'updated_since' is older than the {TOMBSTONE_RETENTION_DAYS}-day deletion history; reload the full list"}
+                ),
+            }
+
+        joins = []
+        conditions = []
+        params = []
+        if email_filter or expand_product:
+            joins.append("INNER JOIN product prod ON p.product_id = prod.id")
+        if email_filter:
+            conditions.append("prod.email = %s")
+            params.append(email_filter)
+        if ids:
+            conditions.append("p.id = ANY(%s)")
+            params.append(ids)
+        if product_id is not None:
+            conditions.append("p.product_id = %s")
+            params.append(product_id)
+        if statuses:
+            conditions.append("p.status = ANY(%s)")
+            params.append(statuses)
+        # Ambos extremos inclusive (end_at es DATE)
+        if ending_before:
+            conditions.append("p.end_at <= %s")
+            params.append(ending_before)
+        if ending_after:
+            conditions.append("p.end_at >= %s")
+            params.append(ending_after)
+        # Un join actualiza el pool (update_pool_request_totals) y con eso su updated_at
+        if updated_since:
+            conditions.append("p.updated_at >= %s")
+            params.append(updated_since)
+        if after:
+            condition, condition_params = keyset_condition(after, "p")
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        query = f"SELECT {pool_select(fields, expand_product)} FROM pool p "
+        query += " ".join(joins)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY p.created_at DESC, p.id DESC"
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit + 1)
 
         with conn.cursor() as cur:
-            if email_filter:
-                cur.execute(
-                    """
-                    SELECT p.id, p.product_id, p.start_at, p.end_at, p.min_quantity, p.created_at,
-                        p.updated_at, p.status, COALESCE(SUM(r.quantity), 0) as joined
-                    FROM pool p
-                    INNER JOIN product prod ON p.product_id = prod.id
-                    LEFT JOIN request r ON p.id = r.pool_id
-                    WHERE prod.email = %s
-                    GROUP BY p.id, p.product_id, p.start_at, p.end_at, p.min_quantity, p.created_at, p.updated_at
-                    ORDER BY p.created_at DESC
-                    """,
-                    (email_filter,),
-                )
+            if updated_since:
+                watermark = fetch_watermark(cur)
+
+            if SERVER_SIDE_JSON:
+                body = fetch_json_body(cur, query, params, limit)
             else:
-                cur.execute(
-                    """
-                    SELECT p.id, p.product_id, p.start_at, p.end_at, p.min_quantity, p.created_at,
-                        p.updated_at, p.status, COALESCE(SUM(r.quantity), 0) as joined
-                    FROM pool p
-                    LEFT JOIN request r ON p.id = r.pool_id
-                    GROUP BY p.id, p.product_id, p.start_at, p.end_at, p.min_quantity, p.created_at, p.updated_at
-                    ORDER BY p.created_at DESC
-                    """
-                )
-
-            pools = cur.fetchall()
-            pool_list = [
-                {
-                    "id": row[0],
-                    "product_id": row[1],
-                    "start_at": row[2].isoformat(),
-                    "end_at": row[3].isoformat(),
-                    "min_quantity": row[4],
-                    "created_at": row[5].isoformat(),
-                    "updated_at": row[6].isoformat(),
-                    "status": row[7],
-                    "joined": int(row[8]),
-                }
-                for row in pools
-            ]
-            return {
+                cur.execute(query, params)
+
+                pools = cur.fetchall()
+                pool_list = [pool_from_row(row, fields, expand_product) for row in pools]
+                body = json.dumps(page_body(pool_list, limit, row_cursor_keys(pools)) if limit else pool_list)
+
+            # Con ?updated_since=: {"items", "deleted", "watermark"}
+            if updated_since:
+                body = changes_body(body, fetch_deleted_ids(cur, "pool", updated_since), watermark)
+
+            response = {
                 "statusCode": 200,
                 "headers": {"Access-Control-Allow-Origin": "*"},
-                "body": json.dumps(pool_list),
+                "body": body,
             }
+            return compress_response(event, response)
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error executing query: {e}")
@@ -100,5 +168,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -2,10 +2,7 @@ import json
 import os
 import uuid
 
-import boto3
-from botocore.exceptions import ClientError
-
-s3_client = boto3.client("s3")
+from common.aws import get_client
 
 
 def handler(event, context):
@@ -16,10 +13,13 @@ def handler(event, context):
             "body": json.dumps({"error": "Bucket name not configured"}),
         }
 
+    # ClientError se toma del cliente: importar botocore.exceptions al cargar
+    # el módulo sumaría parte del import de botocore al cold start
+    s3 = get_client("s3")
     try:
         object_key = f"uploads/{uuid.uuid4()}"
 
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = s3.generate_presigned_url(
             "put_object",
             Params={
                 "Bucket": bucket_name,
@@ -39,7 +39,7 @@ def handler(event, context):
             "body": json.dumps({"uploadURL": presigned_url, "objectKey": object_key}),
         }
 
-    except ClientError as e:
+    except s3.exceptions.ClientError as e:
         print(f"Error generating presigned URL: {e}")
         return {
             "statusCode": 500,
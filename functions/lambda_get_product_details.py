@@ -1,33 +1,13 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
+from common.responses import compress_response, etag_matches, get_if_none_match, make_etag, not_modified
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     if conn is None:
         return {
             "statusCode": 500,
@@ -36,7 +16,15 @@ def handler(event, context):
 
     try:
         product_id = event["pathParameters"]["id"]
+        if_none_match = get_if_none_match(event)
         with conn.cursor() as cur:
+            # Visita repetida: alcanza con la versión para responder 304
+            if if_none_match:
+                cur.execute("SELECT id, updated_at FROM product WHERE id = %s", (product_id,))
+                version = cur.fetchone()
+                if version and etag_matches(if_none_match, make_etag(*version)):
+                    return not_modified(make_etag(*version))
+
             cur.execute(
                 "SELECT id, name, description, category, unit_price, image_url, created_at, updated_at FROM product WHERE id = %s",
                 (product_id,),
@@ -55,11 +43,16 @@ def handler(event, context):
                     "updated_at": product[7].isoformat(),
                 }
 
-                return {
+                response = {
                     "statusCode": 200,
-                    "headers": {"Access-Control-Allow-Origin": "*"},
+                    "headers": {
+                        "Access-Control-Allow-Origin": "*",
+                        "ETag": make_etag(product[0], product[7]),
+                        "Cache-Control": "private, no-cache",
+                    },
                     "body": json.dumps(product_details),
                 }
+                return compress_response(event, response)
 
             else:
                 return {
@@ -80,5 +73,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+from collections import OrderedDict
+
+import psycopg2
+
+from common.db import get_db_connection, release_db_connection
+from common.responses import compress_response
+
+# Cache por contenedor del resultado, por email (None = todo el catálogo). Los
+# conteos pueden quedar atrasados hasta FACETS_CACHE_TTL_SECONDS, lo que alcanza
+# para la barra de categorías.
+FACETS_CACHE_SIZE = int(os.environ.get("FACETS_CACHE_SIZE", "256"))
+FACETS_CACHE_TTL_SECONDS = int(os.environ.get("FACETS_CACHE_TTL_SECONDS", "30"))
+
+_cache = OrderedDict()
+
+# Un solo GROUP BY: productos por categoría y pools abiertos de esos productos
+FACETS_QUERY = """
+    SELECT
+        p.category,
+        COUNT(DISTINCT p.id) AS product_count,
+        COUNT(pl.id) AS open_pool_count
+    FROM product p
+    LEFT JOIN pool pl ON pl.product_id = p.id AND pl.status = 'open'
+    {where}
+    GROUP BY p.category
+    ORDER BY p.category NULLS LAST
+"""
+
+
+def _get_cached(key):
+    entry = _cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    _cache.move_to_end(key)
+    return entry[1]
+
+
+def _store(key, body):
+    _cache[key] = (time.monotonic() + FACETS_CACHE_TTL_SECONDS, body)
+    _cache.move_to_end(key)
+    while len(_cache) > FACETS_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def handler(event, context):
+    query_params = event.get("queryStringParameters") or {}
+    email_filter = query_params.get("email")
+
+    body = _get_cached(email_filter)
+    if body is not None:
+        response = {
+            "statusCode": 200,
+            "headers": {"Access-Control-Allow-Origin": "*"},
+            "body": body,
+        }
+        return compress_response(event, response)
+
+    conn = get_db_connection(readonly=True)
+    if conn is None:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": "Could not connect to the database"}),
+        }
+
+    try:
+        with conn.cursor() as cur:
+            if email_filter:
+                cur.execute(FACETS_QUERY.format(where="WHERE p.email = %s"), (email_filter,))
+            else:
+                cur.execute(FACETS_QUERY.format(where=""))
+
+            facets = [
+                {
+                    "category": row[0],
+                    "product_count": row[1],
+                    "open_pool_count": row[2],
+                }
+                for row in cur.fetchall()
+            ]
+
+        body = json.dumps(facets)
+        _store(email_filter, body)
+
+        response = {
+            "statusCode": 200,
+            "headers": {"Access-Control-Allow-Origin": "*"},
+            "body": body,
+        }
+        return compress_response(event, response)
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error executing query: {e}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {
+                    "error": "An error occurred",
+                    "details": str(e),
+                }
+            ),
+        }
+
+    finally:
+        release_db_connection(conn)
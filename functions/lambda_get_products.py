@@ -1,33 +1,36 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
+from common.db import get_db_connection, release_db_connection
+from common.fields import isoformat, json_fields, parse_fields, row_to_dict, select_columns
+from common.json_sql import SERVER_SIDE_JSON, fetch_json_body, iso_timestamp
+from common.pagination import InvalidPageParams, keyset_condition, page_body, parse_page_params, ranked_keyset_condition, row_cursor_keys
+from common.params import InvalidQueryParam, parse_datetime, parse_ids, parse_search_query
+from common.responses import compress_response
+from common.sync import TOMBSTONE_RETENTION_DAYS, changes_body, fetch_deleted_ids, fetch_watermark, is_expired
 
+# Campos que se pueden pedir con ?fields=
+PRODUCT_FIELDS = {
+    "id": ("id", "id", None),
+    "name": ("name", "name", None),
+    "description": ("description", "description", None),
+    "category": ("category", "category", None),
+    "unit_price": ("unit_price", "unit_price::float8", float),
+    "image_url": ("image_url", "image_url", None),
+    "email": ("email", "email", None),
+    "created_at": ("created_at", iso_timestamp("created_at"), isoformat),
+    "updated_at": ("updated_at", iso_timestamp("updated_at"), isoformat),
+}
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+# Relevancia para ?q=; search_query es el to_tsquery que se agrega al FROM
+SEARCH_RANK = "ts_rank(search_vector, search_query)"
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    query_params = event.get("queryStringParameters") or {}
+    # Las consultas incrementales van al escritor (ver common/sync.py)
+    conn = get_db_connection(readonly="updated_since" not in query_params)
     if conn is None:
         return {
             "statusCode": 500,
@@ -35,40 +38,100 @@ def handler(event, context):
         }
 
     try:
-        email_filter = None
-        if event.get("queryStringParameters"):
-            email_filter = event["queryStringParameters"].get("email")
+        email_filter = query_params.get("email")
+        category_filter = query_params.get("category")
+
+        try:
+            search = parse_search_query(query_params)
+            limit, after = parse_page_params(query_params, ranked=search is not None)
+            ids = parse_ids(query_params)
+            fields = parse_fields(query_params, PRODUCT_FIELDS)
+            updated_since = parse_datetime(query_params, "updated_since")
+            if updated_since and limit:
+                raise InvalidQueryParam("'updated_since' cannot be combined with 'limit' or 'cursor'")
+        except (InvalidPageParams, InvalidQueryParam) as e:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": str(e)}),
+            }
+
+        if updated_since and is_expired(updated_since):
+            return {
+                "statusCode": 410,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps(
+                    {"error": f"'updated_since' is older than the {TOMBSTONE_RETENTION_DAYS}-day deletion history; reload the full list"}
+                ),
+            }
+
+        # created_at e id (y rank) van al final aunque no se pidan: los usa el cursor
+        if SERVER_SIDE_JSON:
+            columns = f"json_build_object({json_fields(PRODUCT_FIELDS, fields)}) AS item, created_at, id"
+        else:
+            columns = f"{select_columns(PRODUCT_FIELDS, fields)}, created_at, id"
+        from_clause = "product"
+        order_by = "created_at DESC, id DESC"
+        conditions = []
+        params = []
+        # Con ?q= los resultados salen ordenados por relevancia. El parámetro
+        # del FROM va primero en params.
+        if search:
+            columns += f", {SEARCH_RANK}::float8 AS rank"
+            from_clause += ", to_tsquery('simple', %s) AS search_query"
+            order_by = f"{SEARCH_RANK} DESC, {order_by}"
+            params.append(search)
+            conditions.append("search_vector @@ search_query")
+        if email_filter:
+            conditions.append("email = %s")
+            params.append(email_filter)
+        if category_filter:
+            conditions.append("category = %s")
+            params.append(category_filter)
+        if ids:
+            conditions.append("id = ANY(%s)")
+            params.append(ids)
+        if updated_since:
+            conditions.append("updated_at >= %s")
+            params.append(updated_since)
+        if after:
+            condition, condition_params = ranked_keyset_condition(after, SEARCH_RANK) if search else keyset_condition(after)
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        query = f"SELECT {columns} FROM {from_clause}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order_by}"
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit + 1)
 
         with conn.cursor() as cur:
-            if email_filter:
-                cur.execute(
-                    "SELECT id, name, description, category, unit_price, image_url, email, created_at, updated_at FROM product WHERE email = %s",
-                    (email_filter,),
-                )
+            if updated_since:
+                watermark = fetch_watermark(cur)
+
+            if SERVER_SIDE_JSON:
+                body = fetch_json_body(cur, query, params, limit, ranked=search is not None)
             else:
-                cur.execute("SELECT id, name, description, category, unit_price, image_url, email, created_at, updated_at FROM product")
+                cur.execute(query, params)
 
-            products = cur.fetchall()
-            product_list = [
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2],
-                    "category": row[3],
-                    "unit_price": float(row[4]) if row[4] is not None else None,
-                    "image_url": row[5],
-                    "email": row[6],
-                    "created_at": row[7].isoformat(),
-                    "updated_at": row[8].isoformat(),
-                }
-                for row in products
-            ]
+                products = cur.fetchall()
+                product_list = [row_to_dict(PRODUCT_FIELDS, fields, row) for row in products]
+                body = json.dumps(
+                    page_body(product_list, limit, row_cursor_keys(products, ranked=search is not None)) if limit else product_list
+                )
 
-            return {
+            # Con ?updated_since=: {"items", "deleted", "watermark"}
+            if updated_since:
+                body = changes_body(body, fetch_deleted_ids(cur, "product", updated_since), watermark)
+
+            response = {
                 "statusCode": 200,
                 "headers": {"Access-Control-Allow-Origin": "*"},
-                "body": json.dumps(product_list),
+                "body": body,
             }
+            return compress_response(event, response)
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error executing query: {e}")
@@ -83,5 +146,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -1,33 +1,79 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
+from common.db import get_db_connection, release_db_connection
+from common.expand import EXPANDED_PRODUCT_COLUMNS, EXPANDED_PRODUCT_JSON, expanded_product, parse_expand
+from common.fields import isoformat, json_fields, parse_fields, row_to_dict, select_columns
+from common.json_sql import SERVER_SIDE_JSON, fetch_json_body, iso_timestamp
+from common.pagination import InvalidPageParams, keyset_condition, page_body, parse_page_params, row_cursor_keys
+from common.params import InvalidQueryParam
+from common.responses import compress_response
 
+# Campos que se pueden pedir con ?fields=
+REQUEST_FIELDS = {
+    "id": ("r.id", "r.id", None),
+    "pool_id": ("r.pool_id", "r.pool_id", None),
+    "email": ("r.email", "r.email", None),
+    "quantity": ("r.quantity", "r.quantity", None),
+    "created_at": ("r.created_at", iso_timestamp("r.created_at"), isoformat),
+}
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
+# Por email cada request trae además el objeto "pool"
+USER_REQUEST_FIELDS = [*REQUEST_FIELDS, "pool"]
+
+USER_REQUEST_POOL_COLUMNS = "p.product_id, p.status, p.start_at, p.end_at, p.min_quantity"
+
+USER_REQUEST_POOL_JSON_FIELDS = """
+    'product_id', p.product_id, 'status', p.status, 'start_at', p.start_at,
+    'end_at', p.end_at, 'min_quantity', p.min_quantity
+"""
+
+
+# fields sin "pool"; con include_pool se agrega el pool y, con ?expand=product,
+# el producto anidado dentro de "pool". r.created_at y r.id van al final
+# aunque no se pidan: los usa el cursor.
+def request_select(fields, include_pool=False, expand_product=False):
+    if SERVER_SIDE_JSON:
+        json_parts = [json_fields(REQUEST_FIELDS, fields)] if fields else []
+        if include_pool:
+            pool_fields = USER_REQUEST_POOL_JSON_FIELDS
+            if expand_product:
+                pool_fields += f", 'product', {EXPANDED_PRODUCT_JSON}"
+            json_parts.append(f"'pool', CASE WHEN p.product_id IS NOT NULL THEN json_build_object({pool_fields}) END")
+        return f"json_build_object({', '.join(json_parts)}) AS item, r.created_at, r.id"
+
+    columns = [select_columns(REQUEST_FIELDS, fields)] if fields else []
+    if include_pool:
+        columns.append(USER_REQUEST_POOL_COLUMNS)
+        if expand_product:
+            columns.append(EXPANDED_PRODUCT_COLUMNS)
+    return f"{', '.join(columns)}, r.created_at, r.id"
 
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+
+def request_from_row(row, fields, include_pool=False, expand_product=False):
+    request = row_to_dict(REQUEST_FIELDS, fields, row)
+    if not include_pool:
+        return request
+
+    offset = len(fields)
+    pool = None
+    if row[offset]:
+        pool = {
+            "product_id": row[offset],
+            "status": row[offset + 1],
+            "start_at": row[offset + 2].isoformat() if row[offset + 2] else None,
+            "end_at": row[offset + 3].isoformat() if row[offset + 3] else None,
+            "min_quantity": row[offset + 4],
+        }
+        if expand_product:
+            pool["product"] = expanded_product(row[offset + 5 : offset + 10])
+    request["pool"] = pool
+    return request
 
 
 def handler(event, context):
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     if conn is None:
         return {
             "statusCode": 500,
@@ -47,64 +93,68 @@ def handler(event, context):
                 "body": json.dumps({"error": "Either 'email' or 'pool_id' parameter is required"}),
             }
 
+        try:
+            limit, after = parse_page_params(query_params)
+            expand_product = "product" in parse_expand(query_params, ["product"])
+            # Por pool_id todos los request son del mismo producto: se pide una vez a /pools/{id}?expand=product
+            if expand_product and not email:
+                raise InvalidQueryParam("'expand=product' requires the 'email' parameter")
+            fields = parse_fields(query_params, USER_REQUEST_FIELDS if email else REQUEST_FIELDS)
+        except (InvalidPageParams, InvalidQueryParam) as e:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": str(e)}),
+            }
+
+        page_conditions = ""
+        page_params = []
+        if after:
+            condition, page_params = keyset_condition(after, "r")
+            page_conditions = f" AND {condition}"
+        page_limit = ""
+        if limit:
+            page_limit = " LIMIT %s"
+            page_params.append(limit + 1)
+
+        # ?expand=product va dentro de "pool", así que lo incluye aunque no se pida
+        include_pool = bool(email) and ("pool" in fields or expand_product)
+        fields = [name for name in fields if name != "pool"]
+
+        if email:
+            query = f"""
+                SELECT {request_select(fields, include_pool, expand_product)}
+                FROM request r
+                {"LEFT JOIN pool p ON r.pool_id = p.id" if include_pool else ""}
+                {"LEFT JOIN product prod ON p.product_id = prod.id" if expand_product else ""}
+                WHERE r.email = %s{page_conditions}
+                ORDER BY r.created_at DESC, r.id DESC{page_limit}
+            """
+            params = [email, *page_params]
+        else:
+            query = f"SELECT {request_select(fields)} FROM request r WHERE r.pool_id = %s{page_conditions} ORDER BY r.created_at DESC, r.id DESC{page_limit}"
+            params = [pool_id, *page_params]
+
         with conn.cursor() as cur:
-            if email:
-                cur.execute(
-                    """
-                    SELECT r.id, r.pool_id, r.email, r.quantity, r.created_at,
-                        p.product_id, p.status, p.start_at, p.end_at, p.min_quantity
-                    FROM request r
-                    LEFT JOIN pool p ON r.pool_id = p.id
-                    WHERE r.email = %s
-                    ORDER BY r.created_at DESC
-                    """,
-                    (email,),
-                )
-                requests = cur.fetchall()
-                request_list = [
-                    {
-                        "id": row[0],
-                        "pool_id": row[1],
-                        "email": row[2],
-                        "quantity": row[3],
-                        "created_at": row[4].isoformat(),
-                        "pool": (
-                            {
-                                "product_id": row[5],
-                                "status": row[6],
-                                "start_at": row[7].isoformat() if row[7] else None,
-                                "end_at": row[8].isoformat() if row[8] else None,
-                                "min_quantity": row[9],
-                            }
-                            if row[5]
-                            else None
-                        ),
-                    }
-                    for row in requests
-                ]
-
-            elif pool_id:
-                cur.execute(
-                    "SELECT id, pool_id, email, quantity, created_at FROM request WHERE pool_id = %s ORDER BY created_at DESC",
-                    (pool_id,),
-                )
-                requests = cur.fetchall()
-                request_list = [
-                    {
-                        "id": row[0],
-                        "pool_id": row[1],
-                        "email": row[2],
-                        "quantity": row[3],
-                        "created_at": row[4].isoformat(),
-                    }
-                    for row in requests
-                ]
+            if SERVER_SIDE_JSON:
+                response = {
+                    "statusCode": 200,
+                    "headers": {"Access-Control-Allow-Origin": "*"},
+                    "body": fetch_json_body(cur, query, params, limit),
+                }
+                return compress_response(event, response)
 
-            return {
+            cur.execute(query, params)
+            requests = cur.fetchall()
+
+            request_list = [request_from_row(row, fields, include_pool, expand_product) for row in requests]
+
+            response = {
                 "statusCode": 200,
                 "headers": {"Access-Control-Allow-Origin": "*"},
-                "body": json.dumps(request_list),
+                "body": json.dumps(page_body(request_list, limit, row_cursor_keys(requests)) if limit else request_list),
             }
+            return compress_response(event, response)
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error executing query: {e}")
@@ -120,5 +170,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -1,133 +1,99 @@
 import json
-import os
 
-import boto3
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-sns_topic_arn = os.environ.get("SNS_TOPIC_ARN")
+from common.db import get_db_connection, release_db_connection
+from common.identity import get_user_sub_from_token, check_user_role
+from common.outbox import enqueue_notification
 
-sns_client = boto3.client("sns")
 
+class PoolNotFound(Exception):
+    pass
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
+
+class PoolClosed(Exception):
+    pass
+
+
+# Todo el join en una transacción: se bloquea la fila del pool, se inserta el
+# request (el trigger actualiza pool.joined_quantity) y, si con este request se
+# alcanza el mínimo, se cierra con un UPDATE condicional. Como el pool queda
+# bloqueado hasta el commit, solo un join concurrente puede cerrarlo. Las
+# notificaciones se encolan en el outbox dentro de la misma transacción.
+def join_pool(conn, pool_id, email, quantity):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT p.status, p.min_quantity, p.joined_quantity, pr.name FROM pool p "
+            "JOIN product pr ON p.product_id = pr.id "
+            "WHERE p.id = %s FOR UPDATE OF p",
+            (pool_id,),
         )
-        return conn
+        pool_data = cur.fetchone()
+        if not pool_data:
+            raise PoolNotFound()
 
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+        status, min_quantity, joined_before, product_name = pool_data
+        if status != "open":
+            raise PoolClosed()
 
+        cur.execute(
+            "INSERT INTO request (pool_id, email, quantity, created_at) VALUES (%s, %s, %s, NOW()) RETURNING id, quantity",
+            (pool_id, email, quantity),
+        )
+        request_id, inserted_quantity = cur.fetchone()
+        total_joined = joined_before + inserted_quantity
 
-def check_and_notify_if_full(conn, pool_id):
-    try:
-        with conn.cursor() as cur:
+        participants = None
+        if total_joined >= min_quantity:
             cur.execute(
-                "SELECT p.min_quantity, p.status, pr.name FROM pool p " "JOIN product pr ON p.product_id = pr.id " "WHERE p.id = %s",
-                (pool_id,),
+                """
+                UPDATE pool SET status = 'success'
+                WHERE id = %s AND status = 'open' AND joined_quantity >= min_quantity
+                RETURNING (SELECT string_agg(email || ' (' || quantity || 'u)', ', ' ORDER BY id) FROM request WHERE pool_id = %s)
+                """,
+                (pool_id, pool_id),
             )
-            pool_data = cur.fetchone()
-            if not pool_data:
-                print("No se encontró el pool, no se puede chequear.")
-                return
+            closed = cur.fetchone()
+            if closed:
+                participants = closed[0]
 
-            min_quantity, status, product_name = pool_data
+        enqueue_pool_progress(cur, pool_id, request_id, product_name, min_quantity, total_joined, participants)
 
-            if status != "open":
-                print(f"Pool {pool_id} ya está cerrado (status: {status}). No se notifica.")
-                return
+    conn.commit()
+    return request_id
 
-            cur.execute(
-                "SELECT COALESCE(SUM(quantity), 0) FROM request WHERE pool_id = %s",
-                (pool_id,),
-            )
-            total_joined = cur.fetchone()[0]
-
-            if total_joined >= min_quantity:
-                print(f"¡Pool {pool_id} completado! Total: {total_joined}/{min_quantity}")
-
-                cur.execute("UPDATE pool SET status = 'success' WHERE id = %s", (pool_id,))
-
-                cur.execute("SELECT email, quantity FROM request WHERE pool_id = %s", (pool_id,))
-                participants = cur.fetchall()
-                participant_list = [f"{email} ({qty}u)" for email, qty in participants]
-
-                subject = f"ÉXITO (Inmediato): El pool para '{product_name}' se acaba de llenar!"
-                message_body = (
-                    f"¡Excelentes noticias!\n\n"
-                    f"El pool de compra para '{product_name}' (ID: {pool_id}) acaba de alcanzar el mínimo requerido gracias a la última suscripción.\n\n"
-                    f"- Mínimo Requerido: {min_quantity} unidades\n"
-                    f"- Total Alcanzado: {total_joined} unidades\n\n"
-                    f"La compra se considera cerrada y exitosa.\n"
-                    f"Participantes: {', '.join(participant_list)}"
-                )
-
-                sns_client.publish(TopicArn=sns_topic_arn, Message=message_body, Subject=subject)
-                print(f"Notificación de cierre inmediato enviada para pool {pool_id}.")
-
-                conn.commit()
-            else:
-                percentage = (total_joined / min_quantity) * 100 if min_quantity > 0 else 0
-                
-                if percentage >= 85:
-                    print(f"Pool {pool_id} está al {percentage:.1f}% de su capacidad ({total_joined}/{min_quantity})")
-                    
-                    cur.execute("SELECT email, quantity FROM request WHERE pool_id = %s", (pool_id,))
-                    participants = cur.fetchall()
-                    participant_list = [f"{email} ({qty}u)" for email, qty in participants]
-                    
-                    remaining = min_quantity - total_joined
-                    subject = f"⚠️ AVISO: El pool para '{product_name}' está por cerrar"
-                    message_body = (
-                        f"¡Atención!\n\n"
-                        f"El pool de compra para '{product_name}' (ID: {pool_id}) está al {percentage:.1f}% de su capacidad.\n\n"    
-                        f"¡Únete ahora antes de que se cierre!\n"
-                    )
-                    
-                    sns_client.publish(TopicArn=sns_topic_arn, Message=message_body, Subject=subject)
-                    print(f"Notificación de advertencia (85%+) enviada para pool {pool_id}.")
 
-    except (Exception, psycopg2.Error) as e:
-        print(f"Error en check_and_notify_if_full: {e}")
-        conn.rollback()
+def enqueue_pool_progress(cur, pool_id, request_id, product_name, min_quantity, total_joined, participants):
+    if participants is not None:
+        print(f"¡Pool {pool_id} completado! Total: {total_joined}/{min_quantity}")
 
+        subject = f"ÉXITO (Inmediato): El pool para '{product_name}' se acaba de llenar!"
+        message_body = (
+            f"¡Excelentes noticias!\n\n"
+            f"El pool de compra para '{product_name}' (ID: {pool_id}) acaba de alcanzar el mínimo requerido gracias a la última suscripción.\n\n"
+            f"- Mínimo Requerido: {min_quantity} unidades\n"
+            f"- Total Alcanzado: {total_joined} unidades\n\n"
+            f"La compra se considera cerrada y exitosa.\n"
+            f"Participantes: {participants}"
+        )
 
-def get_user_sub_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-        return claims.get("sub")
-    except Exception as e:
-        print(f"Error extracting sub from token: {e}")
-        return None
-
-
-def check_user_role(conn, sub, required_role):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT role FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0] == required_role
-            return False
-    except Exception as e:
-        print(f"Error checking user role: {e}")
-        return False
+        enqueue_notification(cur, f"pool-{pool_id}-success", subject, message_body)
+        print(f"Notificación de cierre inmediato encolada para pool {pool_id}.")
+        return
+
+    percentage = (total_joined / min_quantity) * 100 if min_quantity > 0 else 0
+    if total_joined < min_quantity and percentage >= 85:
+        print(f"Pool {pool_id} está al {percentage:.1f}% de su capacidad ({total_joined}/{min_quantity})")
+
+        subject = f"⚠️ AVISO: El pool para '{product_name}' está por cerrar"
+        message_body = (
+            f"¡Atención!\n\n"
+            f"El pool de compra para '{product_name}' (ID: {pool_id}) está al {percentage:.1f}% de su capacidad.\n\n"
+            f"¡Únete ahora antes de que se cierre!\n"
+        )
+
+        enqueue_notification(cur, f"pool-{pool_id}-warning-{request_id}", subject, message_body)
+        print(f"Notificación de advertencia (85%+) encolada para pool {pool_id}.")
 
 
 def handler(event, context):
@@ -138,8 +104,6 @@ def handler(event, context):
             "body": json.dumps({"error": "Could not connect to the database"}),
         }
 
-    request_id = None
-
     try:
         user_sub = get_user_sub_from_token(event)
 
@@ -150,68 +114,55 @@ def handler(event, context):
                 "body": json.dumps({"error": "Unauthorized - no user ID found in token"}),
             }
 
-        if not check_user_role(conn, user_sub, "client"):
+        if not check_user_role(conn, user_sub, "client", event):
             return {
                 "statusCode": 403,
                 "headers": {"Access-Control-Allow-Origin": "*"},
                 "body": json.dumps({"error": "Forbidden - only clients can join pools"}),
             }
 
-        with conn.cursor() as cur:
-            pool_id = event["pathParameters"]["id"]
-            body = json.loads(event.get("body", "{}"))
-            email = body.get("email")
-            quantity = body.get("quantity", 1)
-
-            if not email:
-                return {
-                    "statusCode": 400,
-                    "headers": {"Access-Control-Allow-Origin": "*"},
-                    "body": json.dumps({"error": "Email is required in request body"}),
-                }
+        pool_id = event["pathParameters"]["id"]
+        body = json.loads(event.get("body", "{}"))
+        email = body.get("email")
+        quantity = body.get("quantity", 1)
 
-            cur.execute("SELECT status FROM pool WHERE id = %s", (pool_id,))
-            pool_status = cur.fetchone()
+        if not email:
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": "Email is required in request body"}),
+            }
 
-            if pool_status and pool_status[0] != "open":
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": f"El pool (ID: {pool_id}) ya está cerrado."}),
-                }
+        try:
+            request_id = join_pool(conn, pool_id, email, quantity)
 
-            try:
-                cur.execute(
-                    "INSERT INTO request (pool_id, email, quantity, created_at) VALUES (%s, %s, %s, NOW()) RETURNING id",
-                    (pool_id, email, quantity),
-                )
-                request_id = cur.fetchone()[0]
-                conn.commit()
+        except PoolNotFound:
+            conn.rollback()
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"error": f"Pool with ID {pool_id} not found."}),
+            }
 
-                check_and_notify_if_full(conn, pool_id)
+        except PoolClosed:
+            conn.rollback()
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": f"El pool (ID: {pool_id}) ya está cerrado."}),
+            }
 
-                return {
-                    "statusCode": 201,
-                    "headers": {"Access-Control-Allow-Origin": "*"},
-                    "body": json.dumps({"id": request_id}),
-                }
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            return {
+                "statusCode": 400,
+                "headers": {"Access-Control-Allow-Origin": "*"},
+                "body": json.dumps({"error": "This email has already joined this pool."}),
+            }
 
-            except psycopg2.IntegrityError as e:
-                conn.rollback()
-                if "request_pool_id_email_key" in str(e):
-                    return {
-                        "statusCode": 400,
-                        "body": json.dumps({"error": "This email has already joined this pool."}),
-                    }
-                if "request_pool_id_fkey" in str(e):
-                    return {
-                        "statusCode": 404,
-                        "body": json.dumps({"error": f"Pool with ID {pool_id} not found."}),
-                    }
-                return {
-                    "statusCode": 400,
-                    "headers": {"Access-Control-Allow-Origin": "*"},
-                    "body": json.dumps({"error": "This email has already joined this pool."}),
-                }
+        return {
+            "statusCode": 201,
+            "headers": {"Access-Control-Allow-Origin": "*"},
+            "body": json.dumps({"id": request_id}),
+        }
 
     except (Exception, psycopg2.Error) as e:
         print(f"Error executing query: {e}")
@@ -228,5 +179,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
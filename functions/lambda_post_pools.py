@@ -1,56 +1,9 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
-
-
-def get_user_sub_from_token(event):
-    try:
-        request_context = event.get("requestContext", {})
-        authorizer = request_context.get("authorizer", {})
-        claims = authorizer.get("claims", {})
-        if not claims:
-            jwt = authorizer.get("jwt", {})
-            claims = jwt.get("claims", {})
-        return claims.get("sub")
-    except Exception as e:
-        print(f"Error extracting sub from token: {e}")
-        return None
-
-
-def check_user_role(conn, sub, required_role):
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT role FROM user_role WHERE cognito_sub = %s", (sub,))
-            result = cur.fetchone()
-            if result:
-                return result[0] == required_role
-            return False
-    except Exception as e:
-        print(f"Error checking user role: {e}")
-        return False
+from common.db import get_db_connection, release_db_connection
+from common.identity import get_user_sub_from_token, check_user_role
 
 
 def handler(event, context):
@@ -71,7 +24,7 @@ def handler(event, context):
                 "body": json.dumps({"error": "Unauthorized - no user ID found in token"}),
             }
 
-        if not check_user_role(conn, user_sub, "company"):
+        if not check_user_role(conn, user_sub, "company", event):
             return {
                 "statusCode": 403,
                 "headers": {"Access-Control-Allow-Origin": "*"},
@@ -119,5 +72,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,62 @@
+import os
+
+import psycopg2
+
+from common.db import get_db_connection, release_db_connection
+
+ROLE_CLAIM = "custom:role"
+
+# Cognito falla el inicio de sesión si el trigger no responde en 5 s. Con
+# DB_CONNECT_TIMEOUT_SECONDS corto en el entorno y este límite para la consulta,
+# get_role() devuelve None a tiempo aunque la base no responda.
+STATEMENT_TIMEOUT_MS = int(os.environ.get("PRE_TOKEN_STATEMENT_TIMEOUT_MS", "1000"))
+
+
+def get_role(sub):
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    try:
+        with conn.cursor() as cur:
+            # LOCAL: vale sólo para esta transacción, release_db_connection la descarta
+            cur.execute("SET LOCAL statement_timeout = %s", (STATEMENT_TIMEOUT_MS,))
+            cur.execute("SELECT role FROM user_role WHERE cognito_sub = %s", (sub,))
+            result = cur.fetchone()
+            return result[0] if result else None
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error getting user role: {e}")
+        return None
+    finally:
+        release_db_connection(conn)
+
+
+# Trigger de Cognito (pre token generation, evento V2_0): agrega el rol de
+# user_role como claim custom:role al ID y al access token, y el email al access
+# token, para que los handlers autoricen sin consultar la base. Si el usuario
+# todavía no eligió rol o la base no responde, el token sale sin el claim y los
+# handlers buscan el rol en user_role.
+def handler(event, context):
+    user_attributes = event["request"].get("userAttributes", {})
+    sub = user_attributes.get("sub")
+    email = user_attributes.get("email")
+
+    role = get_role(sub) if sub else None
+
+    id_token = {}
+    access_token = {}
+    if role:
+        id_token["claimsToAddOrOverride"] = {ROLE_CLAIM: role}
+        access_token["claimsToAddOrOverride"] = {ROLE_CLAIM: role}
+    else:
+        id_token["claimsToSuppress"] = [ROLE_CLAIM]
+        access_token["claimsToSuppress"] = [ROLE_CLAIM]
+
+    if email:
+        access_token.setdefault("claimsToAddOrOverride", {})["email"] = email
+
+    event["response"]["claimsAndScopeOverrideDetails"] = {
+        "idTokenGeneration": id_token,
+        "accessTokenGeneration": access_token,
+    }
+    return event
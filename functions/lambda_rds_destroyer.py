@@ -1,29 +1,8 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
 
 
 def drop_tables(conn):
@@ -32,12 +11,23 @@ def drop_tables(conn):
         "DROP TABLE IF EXISTS pool CASCADE;",
         "DROP TABLE IF EXISTS product CASCADE;",
         "DROP TABLE IF EXISTS user_role CASCADE;",
+        "DROP TABLE IF EXISTS outbox CASCADE;",
+        "DROP TABLE IF EXISTS tombstone CASCADE;",
+        "DROP TABLE IF EXISTS user_role_version CASCADE;",
+        "DROP SEQUENCE IF EXISTS user_role_version_seq;",
     ]
 
     drop_triggers = [
         "DROP TRIGGER IF EXISTS update_products_updated_at ON product CASCADE;",
         "DROP TRIGGER IF EXISTS update_pools_updated_at ON pool CASCADE;",
+        "DROP TRIGGER IF EXISTS update_pool_request_totals ON request CASCADE;",
         "DROP FUNCTION IF EXISTS update_updated_at_column() CASCADE;",
+        "DROP FUNCTION IF EXISTS update_pool_request_totals() CASCADE;",
+        "DROP FUNCTION IF EXISTS record_tombstone() CASCADE;",
+        "DROP FUNCTION IF EXISTS bump_pool_version() CASCADE;",
+        "DROP FUNCTION IF EXISTS bump_user_role_version() CASCADE;",
+        "DROP FUNCTION IF EXISTS reconcile_pool_totals(BOOLEAN, INTEGER, INTEGER) CASCADE;",
+        "DROP FUNCTION IF EXISTS reconcile_pool_totals(BOOLEAN) CASCADE;",
     ]
 
     try:
@@ -77,7 +67,7 @@ def handler(event, context):
                 "body": json.dumps(
                     {
                         "message": "All tables dropped successfully",
-                        "tables_dropped": ["request", "pool", "product", "user_role"],
+                        "tables_dropped": ["request", "pool", "product", "user_role", "outbox"],
                         "note": "You can now run rds_init to recreate the tables",
                     }
                 ),
@@ -103,5 +93,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -1,33 +1,21 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
 
 
 def create_tables(conn):
-    products_table = """
+    # Vector de búsqueda de ?q= en GET /products. Se usa la configuración
+    # 'simple' (sin stemming) porque el catálogo mezcla español e inglés y la
+    # búsqueda por prefijo del type-ahead tiene que coincidir con lo escrito.
+    product_search_vector = """
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(category, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    """
+
+    products_table = f"""
     CREATE TABLE IF NOT EXISTS product (
         id SERIAL PRIMARY KEY,
         name VARCHAR(255) NOT NULL,
@@ -37,7 +25,8 @@ def create_tables(conn):
         image_url VARCHAR(512),
         email VARCHAR(254) NOT NULL,
         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        search_vector TSVECTOR GENERATED ALWAYS AS ({product_search_vector}) STORED
     );
     """
 
@@ -49,6 +38,9 @@ def create_tables(conn):
         end_at DATE NOT NULL,
         min_quantity INTEGER NOT NULL CHECK (min_quantity > 0),
         status VARCHAR(10) NOT NULL DEFAULT 'open',
+        joined_quantity INTEGER NOT NULL DEFAULT 0,
+        participant_count INTEGER NOT NULL DEFAULT 0,
+        version INTEGER NOT NULL DEFAULT 1,
         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         CHECK (status IN ('open', 'success', 'failed'))
@@ -77,6 +69,51 @@ def create_tables(conn):
     );
     """
 
+    outbox_table = """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id BIGSERIAL PRIMARY KEY,
+        dedupe_key VARCHAR(255) NOT NULL UNIQUE,
+        subject TEXT NOT NULL,
+        message TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP WITH TIME ZONE,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    # Borrados de product y pool (incluidos los pools que se van en cascada),
+    # para que ?updated_since= los informe. common/sync.py
+    tombstone_table = """
+    CREATE TABLE IF NOT EXISTS tombstone (
+        id BIGSERIAL PRIMARY KEY,
+        entity VARCHAR(20) NOT NULL,
+        entity_id INTEGER NOT NULL,
+        deleted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    # Una sola fila cuya versión avanza con cada cambio en user_role, para que
+    # los contenedores descarten su cache de identidades (common/identity.py).
+    user_role_version_table = """
+    CREATE TABLE IF NOT EXISTS user_role_version (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        version BIGINT NOT NULL DEFAULT 0
+    );
+    INSERT INTO user_role_version DEFAULT VALUES ON CONFLICT DO NOTHING;
+    """
+
+    # Para bases creadas antes de que pool tuviera los totales desnormalizados y
+    # la versión, y product el vector de búsqueda. user_role_version reemplaza a
+    # la secuencia user_role_version_seq.
+    migrations = [
+        "ALTER TABLE pool ADD COLUMN IF NOT EXISTS joined_quantity INTEGER NOT NULL DEFAULT 0;",
+        "ALTER TABLE pool ADD COLUMN IF NOT EXISTS participant_count INTEGER NOT NULL DEFAULT 0;",
+        "ALTER TABLE pool ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;",
+        f"ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS ({product_search_vector}) STORED;",
+        "DROP SEQUENCE IF EXISTS user_role_version_seq;",
+    ]
+
     indexes = [
         "CREATE INDEX IF NOT EXISTS idx_pools_product_id ON pool(product_id);",
         "CREATE INDEX IF NOT EXISTS idx_pools_status ON pool(status);",
@@ -86,6 +123,18 @@ def create_tables(conn):
         "CREATE INDEX IF NOT EXISTS idx_products_email ON product(email);",
         "CREATE INDEX IF NOT EXISTS idx_user_role_email ON user_role(email);",
         "CREATE INDEX IF NOT EXISTS idx_user_role_sub ON user_role(cognito_sub);",
+        "CREATE INDEX IF NOT EXISTS idx_products_created_id ON product(created_at DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_products_email_created_id ON product(email, created_at DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_pools_created_id ON pool(created_at DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_requests_pool_created_id ON request(pool_id, created_at DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_requests_email_created_id ON request(email, created_at DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(next_attempt_at, id) WHERE sent_at IS NULL;",
+        "CREATE INDEX IF NOT EXISTS idx_pools_product_status ON pool(product_id, status);",
+        "CREATE INDEX IF NOT EXISTS idx_pools_open_end_at ON pool(end_at) WHERE status = 'open';",
+        "CREATE INDEX IF NOT EXISTS idx_products_search ON product USING GIN(search_vector);",
+        "CREATE INDEX IF NOT EXISTS idx_products_updated_at ON product(updated_at);",
+        "CREATE INDEX IF NOT EXISTS idx_pools_updated_at ON pool(updated_at);",
+        "CREATE INDEX IF NOT EXISTS idx_tombstone_entity_deleted_at ON tombstone(entity, deleted_at);",
     ]
 
     update_trigger = """
@@ -108,7 +157,151 @@ def create_tables(conn):
         FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
     """
 
-    tables = [products_table, pools_table, requests_table, user_role_table]
+    # Cada UPDATE de pool (un join o una baja pasan por update_pool_request_totals,
+    # el cierre por check_pools) avanza pool.version y avisa en el canal
+    # pool_progress_<id>, que escucha lambda_get_pool_progress. NOTIFY se
+    # entrega recién al confirmar la transacción.
+    pool_version_trigger = """
+    CREATE OR REPLACE FUNCTION bump_pool_version()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.version = OLD.version + 1;
+        PERFORM pg_notify('pool_progress_' || NEW.id, NEW.version::text);
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql';
+
+    DROP TRIGGER IF EXISTS bump_pool_version ON pool;
+    CREATE TRIGGER bump_pool_version
+        BEFORE UPDATE ON pool
+        FOR EACH ROW EXECUTE FUNCTION bump_pool_version();
+    """
+
+    # Va en la misma transacción que el cambio de rol: la versión nueva se ve
+    # junto con el rol nuevo y no se puede perder entre dos commits.
+    user_role_version_trigger = """
+    CREATE OR REPLACE FUNCTION bump_user_role_version()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        UPDATE user_role_version SET version = version + 1;
+        RETURN NULL;
+    END;
+    $$ language 'plpgsql';
+
+    DROP TRIGGER IF EXISTS bump_user_role_version ON user_role;
+    CREATE TRIGGER bump_user_role_version
+        AFTER INSERT OR UPDATE OR DELETE ON user_role
+        FOR EACH ROW EXECUTE FUNCTION bump_user_role_version();
+    """
+
+    # Los cambios en request ya tocan pool (update_pool_request_totals) y con
+    # eso su updated_at; los borrados quedan en tombstone.
+    tombstone_trigger = """
+    CREATE OR REPLACE FUNCTION record_tombstone()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        INSERT INTO tombstone (entity, entity_id) VALUES (TG_ARGV[0], OLD.id);
+        RETURN NULL;
+    END;
+    $$ language 'plpgsql';
+
+    DROP TRIGGER IF EXISTS record_product_tombstone ON product;
+    CREATE TRIGGER record_product_tombstone
+        AFTER DELETE ON product
+        FOR EACH ROW EXECUTE FUNCTION record_tombstone('product');
+
+    DROP TRIGGER IF EXISTS record_pool_tombstone ON pool;
+    CREATE TRIGGER record_pool_tombstone
+        AFTER DELETE ON pool
+        FOR EACH ROW EXECUTE FUNCTION record_tombstone('pool');
+    """
+
+    # pool.joined_quantity y pool.participant_count se mantienen en la misma
+    # transacción que el INSERT/DELETE sobre request. reconcile_pool_totals()
+    # los recalcula desde request y corrige los que se hayan desviado; corre
+    # acá y una vez por día en lambda_reconcile_pools, de a tandas de ids.
+    pool_totals_trigger = """
+    CREATE OR REPLACE FUNCTION update_pool_request_totals()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE pool
+            SET joined_quantity = joined_quantity - OLD.quantity,
+                participant_count = participant_count - 1
+            WHERE id = OLD.pool_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE pool
+            SET joined_quantity = joined_quantity + NEW.quantity,
+                participant_count = participant_count + 1
+            WHERE id = NEW.pool_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ language 'plpgsql';
+
+    DROP TRIGGER IF EXISTS update_pool_request_totals ON request;
+    CREATE TRIGGER update_pool_request_totals
+        AFTER INSERT OR DELETE OR UPDATE OF pool_id, quantity ON request
+        FOR EACH ROW EXECUTE FUNCTION update_pool_request_totals();
+
+    -- La firma anterior era (BOOLEAN): sin este DROP quedarían las dos y la
+    -- llamada sin argumentos sería ambigua
+    DROP FUNCTION IF EXISTS reconcile_pool_totals(BOOLEAN);
+
+    CREATE OR REPLACE FUNCTION reconcile_pool_totals(only_open BOOLEAN DEFAULT FALSE, after_id INTEGER DEFAULT 0, up_to_id INTEGER DEFAULT NULL)
+    RETURNS INTEGER AS $$
+    DECLARE
+        drifted_ids INTEGER[];
+        repaired INTEGER;
+    BEGIN
+        -- Sólo se bloquean los pools de (after_id, up_to_id] cuyo total difiere,
+        -- y sin esperar: los que tiene tomados un join o check_pools quedan
+        -- para la próxima pasada.
+        SELECT array_agg(id) INTO drifted_ids
+        FROM (
+            SELECT p.id
+            FROM pool p
+            WHERE p.id IN (
+                SELECT pl.id
+                FROM pool pl
+                LEFT JOIN request r ON r.pool_id = pl.id
+                WHERE pl.id > after_id AND (up_to_id IS NULL OR pl.id <= up_to_id)
+                AND (NOT only_open OR pl.status = 'open')
+                GROUP BY pl.id
+                HAVING pl.joined_quantity <> COALESCE(SUM(r.quantity), 0) OR pl.participant_count <> COUNT(r.id)
+            )
+            ORDER BY p.id
+            FOR UPDATE SKIP LOCKED
+        ) locked;
+
+        IF drifted_ids IS NULL THEN
+            RETURN 0;
+        END IF;
+
+        -- Con los pools ya bloqueados se vuelve a sumar: esta sentencia ve los
+        -- request confirmados antes del bloqueo y ningún join nuevo puede
+        -- tocar esos pools hasta el commit
+        UPDATE pool p
+        SET joined_quantity = t.joined_quantity,
+            participant_count = t.participant_count
+        FROM (
+            SELECT pl.id, COALESCE(SUM(r.quantity), 0) AS joined_quantity, COUNT(r.id) AS participant_count
+            FROM pool pl
+            LEFT JOIN request r ON r.pool_id = pl.id
+            WHERE pl.id = ANY(drifted_ids)
+            GROUP BY pl.id
+        ) t
+        WHERE p.id = t.id
+        AND (p.joined_quantity <> t.joined_quantity OR p.participant_count <> t.participant_count);
+
+        GET DIAGNOSTICS repaired = ROW_COUNT;
+        RETURN repaired;
+    END;
+    $$ language 'plpgsql';
+    """
+
+    tables = [products_table, pools_table, requests_table, user_role_table, outbox_table, tombstone_table, user_role_version_table]
 
     try:
         with conn.cursor() as cur:
@@ -116,6 +309,10 @@ def create_tables(conn):
                 cur.execute(table_sql)
                 print(f"Executed: {table_sql[:50]}...")
 
+            for migration_sql in migrations:
+                cur.execute(migration_sql)
+                print(f"Executed: {migration_sql[:50]}...")
+
             for index_sql in indexes:
                 cur.execute(index_sql)
                 print(f"Created index: {index_sql[:50]}...")
@@ -123,6 +320,19 @@ def create_tables(conn):
             cur.execute(update_trigger)
             print("Created update triggers")
 
+            cur.execute(tombstone_trigger)
+            print("Created tombstone triggers")
+
+            cur.execute(pool_version_trigger)
+            print("Created pool version trigger")
+
+            cur.execute(user_role_version_trigger)
+            print("Created user role version trigger")
+
+            cur.execute(pool_totals_trigger)
+            cur.execute("SELECT reconcile_pool_totals()")
+            print(f"Created pool totals trigger, {cur.fetchone()[0]} pools reconciled")
+
             conn.commit()
             print("All tables created successfully")
             return True
@@ -151,7 +361,7 @@ def handler(event, context):
                 "body": json.dumps(
                     {
                         "message": "Database initialized successfully",
-                        "tables_created": ["product", "pool", "request", "user_role"],
+                        "tables_created": ["product", "pool", "request", "user_role", "outbox"],
                     }
                 ),
             }
@@ -174,5 +384,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,63 @@
+import json
+import os
+
+import psycopg2
+
+from common.db import get_db_connection, release_db_connection
+
+BATCH_SIZE = int(os.environ.get("RECONCILE_BATCH_SIZE", "500"))
+TIME_MARGIN_MS = int(os.environ.get("RECONCILE_TIME_MARGIN_MS", "10000"))
+
+
+# Corrige pool.joined_quantity y pool.participant_count de los pools abiertos
+# que se hayan desviado de request, de a BATCH_SIZE ids en orden y cada tanda
+# en su propia transacción. reconcile_pool_totals sólo bloquea los pools con
+# diferencias y saltea los que están tomados (SKIP LOCKED), así que no frena
+# los joins ni a check_pools; lo salteado se corrige en la próxima corrida.
+def reconcile_batch(conn, after_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT MAX(id)
+            FROM (SELECT id FROM pool WHERE id > %s AND status = 'open' ORDER BY id LIMIT %s) batch
+            """,
+            (after_id, BATCH_SIZE),
+        )
+        up_to_id = cur.fetchone()[0]
+        if up_to_id is None:
+            conn.commit()
+            return None, 0
+
+        cur.execute("SELECT reconcile_pool_totals(TRUE, %s, %s)", (after_id, up_to_id))
+        repaired = cur.fetchone()[0]
+
+    conn.commit()
+    return up_to_id, repaired
+
+
+def handler(event, context):
+    conn = get_db_connection()
+    if conn is None:
+        print("Error: No se pudo conectar a la DB")
+        return
+
+    after_id = 0
+    repaired = 0
+    try:
+        while context.get_remaining_time_in_millis() >= TIME_MARGIN_MS:
+            after_id, batch_repaired = reconcile_batch(conn, after_id)
+            if after_id is None:
+                break
+            repaired += batch_repaired
+        else:
+            print(f"Tiempo de ejecución casi agotado, se revisaron los pools hasta el id {after_id}.")
+
+        print(f"Reconciliación finalizada. Totales de {repaired} pools abiertos corregidos.")
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error en el handler: {e}")
+        conn.rollback()
+    finally:
+        release_db_connection(conn)
+
+    return {"statusCode": 200, "body": json.dumps("OK")}
@@ -0,0 +1,52 @@
+import importlib
+import json
+
+# Despliegue alternativo a una Lambda por ruta: una sola función atiende todas
+# las rutas del HTTP API y delega en el handler de siempre según routeKey. Como
+# todos los handlers corren en el mismo contenedor comparten la conexión de
+# common.db y el cache de common.identity. Cada módulo se importa recién la
+# primera vez que llega su ruta, así el cold start no paga los imports de todas.
+ROUTES = {
+    "GET /products": "lambda_get_products",
+    "POST /products": "lambda_post_products",
+    "GET /products/facets": "lambda_get_product_facets",
+    "GET /products/{id}": "lambda_get_product_details",
+    "DELETE /products/{id}": "lambda_delete_product",
+    "GET /pools": "lambda_get_pools",
+    "POST /pools": "lambda_post_pools",
+    "GET /pools/{id}": "lambda_get_pool_details",
+    "GET /pools/{id}/progress": "lambda_get_pool_progress",
+    "POST /pools/{id}/requests": "lambda_post_pool_requests",
+    "GET /requests": "lambda_get_requests",
+    "POST /images/presigned-url": "lambda_get_presigned_url",
+    "GET /analytics/overview": "lambda_get_analytics_overview",
+    "GET /analytics/pools/sales": "lambda_get_analytics_pools_sales",
+    "POST /users/role": "lambda_set_user_role",
+    "GET /users/role": "lambda_get_user_role",
+}
+
+_handlers = {}
+
+
+def get_handler(route_key):
+    module_name = ROUTES.get(route_key)
+    if module_name is None:
+        return None
+
+    if route_key not in _handlers:
+        _handlers[route_key] = importlib.import_module(module_name).handler
+    return _handlers[route_key]
+
+
+def handler(event, context):
+    route_key = event.get("routeKey")
+    route_handler = get_handler(route_key)
+
+    if route_handler is None:
+        return {
+            "statusCode": 404,
+            "headers": {"Access-Control-Allow-Origin": "*"},
+            "body": json.dumps({"error": f"No handler for route {route_key}"}),
+        }
+
+    return route_handler(event, context)
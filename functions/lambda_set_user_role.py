@@ -1,29 +1,9 @@
 import json
-import os
 
 import psycopg2
 
-db_host = os.environ.get("DB_HOST")
-db_port = os.environ.get("DB_PORT")
-db_name = os.environ.get("DB_NAME")
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-
-
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db_host,
-            port=db_port,
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-        )
-        return conn
-
-    except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
-        return None
+from common.db import get_db_connection, release_db_connection
+from common.identity import get_user_sub_from_token, store_identity
 
 
 def handler(event, context):
@@ -53,17 +33,7 @@ def handler(event, context):
                 "body": json.dumps({"error": "Role must be either 'client' or 'company'"}),
             }
 
-        sub = None
-        try:
-            request_context = event.get("requestContext", {})
-            authorizer = request_context.get("authorizer", {})
-            claims = authorizer.get("claims", {})
-            if not claims:
-                jwt = authorizer.get("jwt", {})
-                claims = jwt.get("claims", {})
-            sub = claims.get("sub")
-        except:
-            pass
+        sub = get_user_sub_from_token(event)
 
         if not sub:
             return {
@@ -108,7 +78,9 @@ def handler(event, context):
                     )
                     result = cur.fetchone()
 
+            # El trigger de user_role avanza user_role_version en esta misma transacción
             conn.commit()
+            store_identity(result[2], result[3], result[1])
 
             return {
                 "statusCode": 200,
@@ -139,5 +111,4 @@ def handler(event, context):
         }
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
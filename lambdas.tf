@@ -48,8 +48,22 @@ resource "null_resource" "init_database" {
 
 data "archive_file" "lambda_cognito_trigger_zip" {
   type        = "zip"
-  source_file = "${path.module}/functions/lambda_cognito_trigger.py"
   output_path = "${path.module}/functions/lambda_cognito_trigger.zip"
+
+  source {
+    content  = file("${path.module}/functions/lambda_cognito_trigger.py")
+    filename = "lambda_cognito_trigger.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/__init__.py")
+    filename = "common/__init__.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/aws.py")
+    filename = "common/aws.py"
+  }
 }
 
 resource "aws_lambda_function" "cognito_trigger" {
@@ -86,6 +100,74 @@ resource "aws_lambda_permission" "allow_cognito" {
   source_arn    = aws_cognito_user_pool.this.arn
 }
 
+resource "archive_file" "lambda_pre_token_generation_zip" {
+  type        = "zip"
+  output_path = "${path.module}/functions/lambda_pre_token_generation.zip"
+
+  source {
+    content  = file("${path.module}/functions/lambda_pre_token_generation.py")
+    filename = "lambda_pre_token_generation.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/__init__.py")
+    filename = "common/__init__.py"
+  }
+
+  source {
+    content  = file("${path.module}/functions/common/db.py")
+    filename = "common/db.py"
+  }
+}
+
+# Agrega el rol de user_role como claim custom:role a los tokens de Cognito
+resource "aws_lambda_function" "pre_token_generation" {
+  filename         = archive_file.lambda_pre_token_generation_zip.output_path
+  function_name    = "${var.project_name}-pre-token-generation"
+  role             = "arn:aws:iam::${data.aws_caller_identity.current.account_id}:role/LabRole"
+  handler          = "lambda_pre_token_generation.handler"
+  runtime          = var.lambda_runtime
+  timeout          = 5
+  layers           = [aws_lambda_layer_version.psycopg2.arn]
+  source_code_hash = archive_file.lambda_pre_token_generation_zip.output_base64sha256
+
+  vpc_config {
+    subnet_ids         = module.vpc.private_lambda_subnet_ids
+    security_group_ids = [aws_security_group.lambda.id]
+  }
+
+  environment {
+    variables = {
+      DB_HOST     = aws_db_proxy.this.endpoint
+      DB_PORT     = "5432"
+      DB_NAME     = aws_db_instance.this.db_name
+      DB_USER     = var.db_username
+      DB_PASSWORD = var.db_password
+
+      # Tiene que contestar dentro de los 5 s de Cognito aunque la base no
+      # responda (2 s es el mínimo de connect_timeout en libpq)
+      DB_CONNECT_TIMEOUT_SECONDS     = "2"
+      PRE_TOKEN_STATEMENT_TIMEOUT_MS = "1000"
+    }
+  }
+
+  depends_on = [
+    aws_db_proxy_target.this
+  ]
+
+  tags = {
+    Name = "${var.project_name}-pre-token-generation"
+  }
+}
+
+resource "aws_lambda_permission" "allow_cognito_pre_token_generation" {
+  statement_id  = "AllowCognitoInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.pre_token_generation.function_name
+  principal     = "cognito-idp.amazonaws.com"
+  source_arn    = aws_cognito_user_pool.this.arn
+}
+
 module "rds_destroyer" {
   source = "./modules/lambda"
 
@@ -22,10 +22,17 @@ resource "aws_apigatewayv2_authorizer" "cognito" {
   }
 }
 
+locals {
+  use_router = var.router != null
+
+  # Rutas con Lambda propia: todas sin router, y con router sólo las que tienen tope de concurrencia
+  dedicated_routes = local.use_router ? { for key, route in var.routes : key => route if route.reserved_concurrent_executions != null } : var.routes
+}
+
 module "endpoints" {
   source = "../lambda"
 
-  for_each = var.routes
+  for_each = local.dedicated_routes
 
   filename      = each.value.filename
   function_name = each.value.function_name
@@ -39,11 +46,44 @@ module "endpoints" {
 
   environment_variables = var.environment_variables
 
+  reserved_concurrent_executions = coalesce(each.value.reserved_concurrent_executions, -1)
+
+  tags = var.tags
+}
+
+# Con router una sola Lambda atiende todas las rutas en lugar de una por ruta
+module "router" {
+  source = "../lambda"
+
+  count = local.use_router ? 1 : 0
+
+  filename      = var.router.filename
+  function_name = var.router.function_name
+  handler       = var.router.handler
+  role          = var.role
+  runtime       = var.runtime
+  layers        = var.layers
+
+  subnet_ids      = var.subnet_ids
+  security_groups = var.security_groups
+
+  environment_variables = var.environment_variables
+
   tags = var.tags
 }
 
+resource "aws_lambda_permission" "router" {
+  count = local.use_router ? 1 : 0
+
+  statement_id  = "AllowAPIGatewayInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = module.router[0].function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.this.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "this" {
-  for_each = var.routes
+  for_each = local.dedicated_routes
 
   statement_id  = "AllowAPIGatewayInvoke"
   action        = "lambda:InvokeFunction"
@@ -67,7 +107,7 @@ resource "aws_apigatewayv2_integration" "this" {
 
   api_id           = aws_apigatewayv2_api.this.id
   integration_type = "AWS_PROXY"
-  integration_uri  = module.endpoints[each.key].invoke_arn
+  integration_uri  = contains(keys(local.dedicated_routes), each.key) ? module.endpoints[each.key].invoke_arn : module.router[0].invoke_arn
 }
 
 resource "aws_apigatewayv2_stage" "this" {
@@ -15,10 +15,10 @@ output "execution_arn" {
 
 output "lambda_function_arns" {
   description = "ARNs of the Lambda functions"
-  value       = { for k, v in module.endpoints : k => v.function_arn }
+  value       = local.use_router ? { router = module.router[0].function_arn } : { for k, v in module.endpoints : k => v.function_arn }
 }
 
 output "lambda_function_names" {
   description = "Names of the Lambda functions"
-  value       = { for k, v in module.endpoints : k => v.function_name }
+  value       = local.use_router ? { router = module.router[0].function_name } : { for k, v in module.endpoints : k => v.function_name }
 }
@@ -34,9 +34,23 @@ variable "routes" {
     function_name = string
     filename     = string
     handler      = string
+
+    # Tope de ejecuciones simultáneas. Una ruta con tope tiene siempre su
+    # propia Lambda, también con router: si no, el tope frenaría a todas.
+    reserved_concurrent_executions = optional(number)
   }))
 }
 
+variable "router" {
+  description = "Single Lambda that serves every route instead of one function per route (null to deploy one per route)"
+  type = object({
+    function_name = string
+    filename      = string
+    handler       = string
+  })
+  default = null
+}
+
 variable "role" {
   description = "ARN of the IAM role for Lambda functions"
   type        = string
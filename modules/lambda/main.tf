@@ -9,6 +9,8 @@ resource "aws_lambda_function" "this" {
   layers           = var.layers
   timeout = 30
 
+  reserved_concurrent_executions = var.reserved_concurrent_executions
+
   vpc_config {
     subnet_ids         = var.subnet_ids
     security_group_ids = var.security_groups
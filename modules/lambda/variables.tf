@@ -50,3 +50,9 @@ variable "tags" {
   type        = map(string)
   default     = {}
 }
+
+variable "reserved_concurrent_executions" {
+  description = "Máximo de ejecuciones simultáneas de la función (-1 para no reservar)"
+  type        = number
+  default     = -1
+}
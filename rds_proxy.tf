@@ -57,9 +57,11 @@ resource "aws_db_proxy" "this" {
 resource "aws_db_proxy_default_target_group" "this" {
   db_proxy_name = aws_db_proxy.this.name
 
+  # Lo que el proxy no usa queda para las conexiones directas a la instancia
+  # (el LISTEN de get_pool_progress, rds_init)
   connection_pool_config {
     connection_borrow_timeout    = 120
-    max_connections_percent      = 100
+    max_connections_percent      = var.db_proxy_max_connections_percent
     max_idle_connections_percent = 50
   }
 }
@@ -5,6 +5,9 @@ if (typeof window.API_CONFIG === 'undefined') {
   };
 }
 
+// Mismo tope que MAX_IDS_PER_REQUEST en el backend
+const MAX_IDS_PER_REQUEST = 100;
+
 class ApiClient {
   constructor() {
     this.baseUrl = window.API_CONFIG.apiUrl + '/prod';
@@ -80,18 +83,38 @@ class ApiClient {
       throw error;
     }
   }
-  async getProducts(email = null) {
-    if (email) {
-      const queryParams = new URLSearchParams({ email });
-      return this.request(`/products?${queryParams.toString()}`);
+  // Con page = { limit, cursor } la respuesta es { items, next_cursor }
+  // filters acepta q, category, fields (?fields=id,name,... para traer sólo
+  // esos campos) y updated_since. Con q los resultados vienen ordenados por
+  // relevancia y cada palabra matchea por prefijo. Con updated_since la
+  // respuesta es { items, deleted, watermark } y watermark es el
+  // updated_since del próximo pedido.
+  async getProducts(email = null, page = null, filters = null) {
+    const queryParams = new URLSearchParams();
+    if (email) queryParams.append('email', email);
+    for (const [name, value] of Object.entries(filters || {})) {
+      if (value !== null && value !== undefined && value !== '') queryParams.append(name, value);
     }
-    return this.request('/products');
+    this.appendPageParams(queryParams, page);
+
+    const query = queryParams.toString();
+    return this.request(query ? `/products?${query}` : '/products');
+  }
+
+  // [{ category, product_count, open_pool_count }] por categoría
+  async getProductFacets(email = null) {
+    return this.request(email ? `/products/facets?email=${encodeURIComponent(email)}` : '/products/facets');
   }
 
   async getProduct(productId) {
     return this.request(`/products/${productId}`);
   }
 
+  // Trae varios productos en una sola llamada (?ids=) en lugar de uno por uno
+  async getProductsByIds(productIds) {
+    return this.getByIds('/products', productIds);
+  }
+
   async createProduct(productData) {
     return this.request('/products', {
       method: 'POST',
@@ -105,16 +128,46 @@ class ApiClient {
     });
   }
 
-  async getPools(email = null) {
-    if (email) {
-      const queryParams = new URLSearchParams({ email });
-      return this.request(`/pools?${queryParams.toString()}`);
+  // Con expand = 'product' cada pool trae su producto anidado en pool.product.
+  // filters acepta product_id, status, ending_before, ending_after, fields y
+  // updated_since (misma respuesta que en getProducts).
+  async getPools(email = null, page = null, expand = null, filters = null) {
+    const queryParams = new URLSearchParams();
+    if (email) queryParams.append('email', email);
+    if (expand) queryParams.append('expand', expand);
+    for (const [name, value] of Object.entries(filters || {})) {
+      if (value !== null && value !== undefined && value !== '') queryParams.append(name, value);
     }
-    return this.request('/pools');
+    this.appendPageParams(queryParams, page);
+
+    const query = queryParams.toString();
+    return this.request(query ? `/pools?${query}` : '/pools');
   }
 
-  async getPoolDetails(poolId) {
-    return this.request(`/pools/${poolId}`);
+  async getPoolDetails(poolId, expand = null) {
+    return this.request(expand ? `/pools/${poolId}?expand=${expand}` : `/pools/${poolId}`);
+  }
+
+  // Sin version responde el avance actual; con version espera (hasta ~20 s) a que cambie.
+  // Si trae retry_after respondió sin esperar y hay que dejar pasar esos segundos.
+  async getPoolProgress(poolId, version = null) {
+    return this.request(version == null ? `/pools/${poolId}/progress` : `/pools/${poolId}/progress?version=${version}`);
+  }
+
+  async getPoolsByIds(poolIds) {
+    return this.getByIds('/pools', poolIds);
+  }
+
+  // Los ids que no existen simplemente no vienen en la respuesta
+  async getByIds(endpoint, ids) {
+    const uniqueIds = [...new Set(ids.filter((id) => id != null))];
+    const chunks = [];
+    for (let i = 0; i < uniqueIds.length; i += MAX_IDS_PER_REQUEST) {
+      chunks.push(uniqueIds.slice(i, i + MAX_IDS_PER_REQUEST));
+    }
+
+    const results = await Promise.all(chunks.map((chunk) => this.request(`${endpoint}?ids=${chunk.join(',')}`)));
+    return results.flatMap((result) => result || []);
   }
 
   async createPool(poolData) {
@@ -124,7 +177,7 @@ class ApiClient {
     });
   }
   async getRequests(params = {}) {
-    const { email, pool_id } = params;
+    const { email, pool_id, limit, cursor, expand } = params;
 
     if (!email && !pool_id) {
       throw new Error('Either email or pool_id is required to get requests');
@@ -133,10 +186,18 @@ class ApiClient {
     const queryParams = new URLSearchParams();
     if (email) queryParams.append('email', email);
     if (pool_id) queryParams.append('pool_id', pool_id);
+    if (expand) queryParams.append('expand', expand);
+    this.appendPageParams(queryParams, limit ? { limit, cursor } : null);
 
     return this.request(`/requests?${queryParams.toString()}`);
   }
 
+  appendPageParams(queryParams, page) {
+    if (!page) return;
+    queryParams.append('limit', page.limit);
+    if (page.cursor) queryParams.append('cursor', page.cursor);
+  }
+
   async createPoolRequest(poolId, requestData) {
     return this.request(`/pools/${poolId}/requests`, {
       method: 'POST',
@@ -185,10 +246,16 @@ class ApiClient {
   }
 
   async setUserRole(email, role) {
-    return this.request('/users/role', {
+    const result = await this.request('/users/role', {
       method: 'POST',
       body: JSON.stringify({ email, role }),
     });
+
+    // El rol viaja en el token: hay que renovarlo para que el nuevo rol llegue a la API
+    if (result && window.cognitoAuth) {
+      await window.cognitoAuth.refreshSession();
+    }
+    return result;
   }
 
   async getUserRole() {
@@ -146,6 +146,36 @@ class CognitoAuth {
       return false;
     }
   }
+  // Pide tokens nuevos con el refresh token para que incluyan el rol actual (custom:role)
+  async refreshSession() {
+    const refreshToken = localStorage.getItem('cognito_refresh_token');
+    if (!refreshToken) {
+      return false;
+    }
+
+    try {
+      const params = {
+        AuthFlow: 'REFRESH_TOKEN_AUTH',
+        ClientId: window.API_CONFIG.cognito.clientId,
+        AuthParameters: {
+          REFRESH_TOKEN: refreshToken,
+        },
+      };
+
+      const response = await this.cognitoRequest('InitiateAuth', params);
+      if (!response.AuthenticationResult) {
+        return false;
+      }
+
+      this._saveTokens({ ...response.AuthenticationResult, RefreshToken: response.AuthenticationResult.RefreshToken || refreshToken });
+      this.isAuthenticated = true;
+      this.user = this.parseUserFromToken(response.AuthenticationResult.AccessToken);
+      return true;
+    } catch (err) {
+      console.error('Error refreshing session:', err);
+      return false;
+    }
+  }
   getAccessToken() {
     const token = localStorage.getItem('cognito_access_token');
     return token;
@@ -36,13 +36,49 @@ async function loadPoolDetails() {
       showError();
       return;
     }
-    currentPool = await window.apiClient.getPoolDetails(poolId);
-    poolProduct = await window.apiClient.getProduct(currentPool.product_id);
-    await loadPoolRequests(poolId);
+    // El producto viene embebido en el pool, así que pool y requests se piden en paralelo
+    const [pool] = await Promise.all([window.apiClient.getPoolDetails(poolId, 'product'), loadPoolRequests(poolId)]);
+    currentPool = pool;
+    poolProduct = pool.product;
 
     displayPoolDetails();
   } catch (error) {
     showError();
+    return;
+  }
+  watchPoolProgress(currentPool.id);
+}
+
+// Long-poll de /pools/{id}/progress: cada respuesta trae la versión actual y
+// el siguiente pedido espera a que cambie. Termina cuando el pool se cierra.
+async function watchPoolProgress(poolId) {
+  let version = null;
+  let retryDelay = 1000;
+
+  while (currentPool && currentPool.status === 'open') {
+    try {
+      const progress = await window.apiClient.getPoolProgress(poolId, version);
+      if (!progress) {
+        return;
+      }
+      retryDelay = 1000;
+
+      if (version !== null && progress.version !== version) {
+        currentPool.joined = progress.joined;
+        currentPool.status = progress.status;
+        await loadPoolRequests(poolId);
+        displayPoolDetails();
+      }
+      version = progress.version;
+
+      // El servidor respondió sin esperar (sin conexión para el long-poll): no volver a pedir enseguida
+      if (progress.retry_after) {
+        await new Promise((resolve) => setTimeout(resolve, progress.retry_after * 1000));
+      }
+    } catch (error) {
+      await new Promise((resolve) => setTimeout(resolve, retryDelay));
+      retryDelay = Math.min(retryDelay * 2, 30000);
+    }
   }
 }
 
@@ -25,6 +25,8 @@ function getStatusInfo(status) {
 
 let poolsData = [];
 let productsData = [];
+let poolsNextCursor = null;
+const POOLS_PAGE_SIZE = 24;
 
 async function getUserRole() {
   let role = localStorage.getItem('user_role');
@@ -74,6 +76,11 @@ async function initializePools() {
   await loadPools();
   await loadProductsForForm();
 
+  const loadMoreBtn = document.getElementById('pools-load-more-btn');
+  if (loadMoreBtn) {
+    loadMoreBtn.addEventListener('click', () => loadPools(true));
+  }
+
   if (!localStorage.getItem('user_role') && window.cognitoAuth && window.cognitoAuth.isLoggedIn()) {
     setTimeout(async () => {
       await updateUIBasedOnRole();
@@ -182,44 +189,31 @@ async function initializePools() {
   renderPools();
 }
 
-async function loadPools() {
+async function loadPools(append = false) {
+  const loadMoreBtn = document.getElementById('pools-load-more-btn');
   try {
     const loading = document.getElementById('pools-loading');
-    if (loading) loading.classList.remove('hidden');
+    if (loading && !append) loading.classList.remove('hidden');
+    if (loadMoreBtn) loadMoreBtn.disabled = true;
 
     const userRole = localStorage.getItem('user_role');
     const userEmail = localStorage.getItem('user_email');
+    const email = userRole === 'company' && userEmail ? userEmail : null;
 
-    let pools;
-    if (userRole === 'company' && userEmail) {
-      pools = await window.apiClient.getPools(userEmail);
-    } else {
-      pools = await window.apiClient.getPools();
-    }
+    const page = await window.apiClient.getPools(email, { limit: POOLS_PAGE_SIZE, cursor: append ? poolsNextCursor : null }, 'product');
+    poolsNextCursor = page.next_cursor;
 
-    const poolsWithProducts = await Promise.all(
-      pools.map(async (pool) => {
-        try {
-          const product = await window.apiClient.getProduct(pool.product_id);
-          return {
-            ...pool,
-            product: product,
-          };
-        } catch (error) {
-          return {
-            ...pool,
-            product: {
-              id: pool.product_id,
-              name: 'Product not found',
-              description: 'Product information unavailable',
-              unit_price: 0,
-            },
-          };
-        }
-      }),
-    );
+    const poolsWithProducts = page.items.map((pool) => ({
+      ...pool,
+      product: pool.product || {
+        id: pool.product_id,
+        name: 'Product not found',
+        description: 'Product information unavailable',
+        unit_price: 0,
+      },
+    }));
 
-    poolsData = poolsWithProducts;
+    poolsData = append ? poolsData.concat(poolsWithProducts) : poolsWithProducts;
 
     if (loading) loading.classList.add('hidden');
     renderPools();
@@ -227,6 +221,8 @@ async function loadPools() {
     const loading = document.getElementById('pools-loading');
     if (loading) loading.classList.add('hidden');
     showNotification('Error loading pools. Please refresh the page.');
+  } finally {
+    if (loadMoreBtn) loadMoreBtn.disabled = false;
   }
 }
 
@@ -234,6 +230,9 @@ function renderPools() {
   const container = document.getElementById('pools-container');
   const loading = document.getElementById('pools-loading');
   const empty = document.getElementById('pools-empty');
+  const loadMore = document.getElementById('pools-load-more');
+
+  if (loadMore) loadMore.classList.toggle('hidden', !poolsNextCursor);
 
   if (poolsData.length === 0) {
     container.innerHTML = '';
@@ -481,10 +480,12 @@ async function loadProductsForForm() {
     const userRole = localStorage.getItem('user_role');
     const userEmail = localStorage.getItem('user_email');
 
+    // El select y la vista previa sólo usan estos campos
+    const filters = { fields: 'id,name,description,unit_price' };
     if (userRole === 'company' && userEmail) {
-      productsData = await window.apiClient.getProducts(userEmail);
+      productsData = await window.apiClient.getProducts(userEmail, null, filters);
     } else {
-      productsData = await window.apiClient.getProducts();
+      productsData = await window.apiClient.getProducts(null, null, filters);
     }
 
     const productSelect = document.getElementById('pool-product');
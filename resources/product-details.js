@@ -56,8 +56,7 @@ function displayProductDetails(product) {
 
 async function loadRelatedPools(productId) {
   try {
-    const allPools = await window.apiClient.getPools();
-    relatedPools = allPools.filter((pool) => pool.product_id == productId);
+    relatedPools = await window.apiClient.getPools(null, null, null, { product_id: productId });
 
     displayRelatedPools();
   } catch (error) {}
@@ -10,6 +10,14 @@ document.addEventListener('DOMContentLoaded', function () {
   initializeProducts();
 });
 let productsData = [];
+let productsNextCursor = null;
+let productsSearch = null;
+let productsCategory = null;
+let productsRequestId = 0;
+const PRODUCTS_PAGE_SIZE = 24;
+const PRODUCTS_SEARCH_DEBOUNCE_MS = 250;
+// Sólo lo que muestran las tarjetas y el modal de crear pool
+const PRODUCT_CARD_FIELDS = 'id,name,description,unit_price,image_url';
 
 async function initializeProducts() {
   const addProductBtn = document.getElementById('add-product-btn');
@@ -28,6 +36,35 @@ async function initializeProducts() {
   }
 
   await loadProducts();
+  const loadMoreBtn = document.getElementById('products-load-more-btn');
+  if (loadMoreBtn) {
+    loadMoreBtn.addEventListener('click', () => loadProducts(true));
+  }
+
+  // Type-ahead: busca en el servidor (?q=) cuando el usuario deja de tipear
+  const searchInput = document.getElementById('products-search');
+  if (searchInput) {
+    let searchTimeout = null;
+    searchInput.addEventListener('input', () => {
+      clearTimeout(searchTimeout);
+      searchTimeout = setTimeout(() => {
+        // Sin letras ni números no hay nada que buscar (la API lo rechaza)
+        const search = /[\p{L}\p{N}]/u.test(searchInput.value) ? searchInput.value.trim() : null;
+        if (search === productsSearch) return;
+        productsSearch = search;
+        loadProducts();
+      }, PRODUCTS_SEARCH_DEBOUNCE_MS);
+    });
+  }
+
+  const categorySelect = document.getElementById('products-category');
+  if (categorySelect) {
+    loadCategories();
+    categorySelect.addEventListener('change', () => {
+      productsCategory = categorySelect.value || null;
+      loadProducts();
+    });
+  }
   if (addProductBtn) {
     addProductBtn.addEventListener('click', () => {
       modal.classList.remove('hidden');
@@ -121,12 +158,14 @@ async function initializeProducts() {
         const productData = {
           name: document.getElementById('product-name').value,
           description: document.getElementById('product-description').value,
+          category: document.getElementById('product-category').value.trim() || null,
           unit_price: parseFloat(document.getElementById('product-price').value),
           image_url: imageUrl,
         };
 
         await window.apiClient.createProduct(productData);
         await loadProducts();
+        loadCategories();
         closeModal();
         showNotification('Product added successfully!');
       } catch (error) {
@@ -142,26 +181,63 @@ async function initializeProducts() {
   renderProducts();
 }
 
-async function loadProducts() {
+async function loadProducts(append = false) {
+  const loadMoreBtn = document.getElementById('products-load-more-btn');
+  // Si llega la respuesta de una búsqueda vieja después de una nueva, se descarta
+  const requestId = ++productsRequestId;
   try {
     const loading = document.getElementById('products-loading');
-    if (loading) loading.classList.remove('hidden');
+    if (loading && !append) loading.classList.remove('hidden');
+    if (loadMoreBtn) loadMoreBtn.disabled = true;
 
     const userRole = localStorage.getItem('user_role');
     const userEmail = localStorage.getItem('user_email');
+    const email = userRole === 'company' && userEmail ? userEmail : null;
 
-    if (userRole === 'company' && userEmail) {
-      productsData = await window.apiClient.getProducts(userEmail);
-    } else {
-      productsData = await window.apiClient.getProducts();
-    }
+    const page = await window.apiClient.getProducts(email, { limit: PRODUCTS_PAGE_SIZE, cursor: append ? productsNextCursor : null }, { q: productsSearch, category: productsCategory, fields: PRODUCT_CARD_FIELDS });
+    if (requestId !== productsRequestId) return;
+    productsData = append ? productsData.concat(page.items) : page.items;
+    productsNextCursor = page.next_cursor;
 
     if (loading) loading.classList.add('hidden');
     renderProducts();
   } catch (error) {
+    if (requestId !== productsRequestId) return;
     const loading = document.getElementById('products-loading');
     if (loading) loading.classList.add('hidden');
     showNotification('Error loading products. Please refresh the page.');
+  } finally {
+    if (loadMoreBtn) loadMoreBtn.disabled = false;
+  }
+}
+
+// Los conteos vienen de /products/facets, sin descargar el catálogo
+async function loadCategories() {
+  const categorySelect = document.getElementById('products-category');
+  if (!categorySelect) return;
+
+  try {
+    const userRole = localStorage.getItem('user_role');
+    const userEmail = localStorage.getItem('user_email');
+    const email = userRole === 'company' && userEmail ? userEmail : null;
+
+    const facets = (await window.apiClient.getProductFacets(email)) || [];
+    const options = facets
+      .filter((facet) => facet.category)
+      .map((facet) => {
+        const option = document.createElement('option');
+        option.value = facet.category;
+        option.textContent = `${facet.category} (${facet.product_count})`;
+        return option;
+      });
+
+    const allOption = document.createElement('option');
+    allOption.value = '';
+    allOption.textContent = 'All categories';
+    categorySelect.replaceChildren(allOption, ...options);
+    categorySelect.value = productsCategory || '';
+  } catch (error) {
+    console.error('Error loading categories:', error);
   }
 }
 
@@ -169,6 +245,9 @@ function renderProducts() {
   const container = document.getElementById('products-container');
   const loading = document.getElementById('products-loading');
   const empty = document.getElementById('products-empty');
+  const loadMore = document.getElementById('products-load-more');
+
+  if (loadMore) loadMore.classList.toggle('hidden', !productsNextCursor);
 
   if (productsData.length === 0) {
     container.innerHTML = '';
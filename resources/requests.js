@@ -171,42 +171,23 @@ async function loadRequests() {
     try {
       const userRequests = await window.apiClient.getRequests({
         email: userEmail,
+        expand: 'product',
       });
 
-      for (const request of userRequests) {
-        try {
-          let poolWithProduct = request.pool || {};
-
-          if (poolWithProduct.product_id) {
-            const product = await window.apiClient.getProduct(poolWithProduct.product_id);
-            poolWithProduct.product = product;
-          } else {
-            poolWithProduct.product = {
+      allRequests = userRequests.map((request) => {
+        const pool = request.pool || {};
+        return {
+          ...request,
+          pool: {
+            ...pool,
+            product: pool.product || {
               name: 'Product not found',
               description: 'Product information unavailable',
               unit_price: 0,
-            };
-          }
-
-          allRequests.push({
-            ...request,
-            pool: poolWithProduct,
-          });
-        } catch (error) {
-          console.error(`Error loading product for request ${request.id}:`, error);
-          allRequests.push({
-            ...request,
-            pool: {
-              ...request.pool,
-              product: {
-                name: 'Product not found',
-                description: 'Product information unavailable',
-                unit_price: 0,
-              },
             },
-          });
-        }
-      }
+          },
+        };
+      });
     } catch (error) {
       console.error('Error loading user requests:', error);
     }
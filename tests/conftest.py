@@ -0,0 +1,53 @@
+import os
+import sys
+import uuid
+
+import psycopg2
+import pytest
+
+# Los handlers importan "common.*" como en el ZIP de cada Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+# Los tests que usan la base necesitan un PostgreSQL de prueba, p. ej.
+# TEST_DATABASE_URL="dbname=postgres user=postgres host=localhost"; sin eso se saltean.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+# Fábrica de conexiones a un esquema propio y vacío creado por lambda_rds_init,
+# para los tests que necesitan varias sesiones a la vez. Las conexiones y el
+# esquema se borran al terminar el test.
+@pytest.fixture
+def db_connect():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    import lambda_rds_init
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+
+    connections = []
+
+    def connect():
+        conn = psycopg2.connect(TEST_DATABASE_URL, options=f"-c search_path={schema}")
+        connections.append(conn)
+        return conn
+
+    try:
+        assert lambda_rds_init.create_tables(connect())
+        yield connect
+    finally:
+        for conn in connections:
+            conn.close()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+# Una conexión al esquema de prueba
+@pytest.fixture
+def db(db_connect):
+    return db_connect()
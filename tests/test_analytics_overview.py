@@ -0,0 +1,145 @@
+import pytest
+
+from lambda_get_analytics_overview import OVERVIEW_QUERY
+
+# Las siete consultas que hacía el handler antes de OVERVIEW_QUERY, tal cual,
+# como referencia de lo que tiene que devolver.
+LEGACY_QUERIES = [
+    (
+        "total_pools",
+        """
+        SELECT COUNT(*)
+        FROM pool p
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s
+        """,
+    ),
+    (
+        "active_pools",
+        """
+        SELECT COUNT(*)
+        FROM pool p
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s AND p.status = 'open'
+        """,
+    ),
+    (
+        "successful_pools",
+        """
+        SELECT COUNT(DISTINCT p.id)
+        FROM pool p
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s
+        AND (SELECT COALESCE(SUM(r.quantity), 0)
+             FROM request r
+             WHERE r.pool_id = p.id) >= p.min_quantity
+        """,
+    ),
+    (
+        "total_revenue",
+        """
+        SELECT COALESCE(SUM(r.quantity * pr.unit_price), 0)
+        FROM request r
+        JOIN pool p ON r.pool_id = p.id
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s
+        """,
+    ),
+    (
+        "total_customers",
+        """
+        SELECT COUNT(DISTINCT r.email)
+        FROM request r
+        JOIN pool p ON r.pool_id = p.id
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s
+        """,
+    ),
+    ("total_products", "SELECT COUNT(*) FROM product WHERE email = %s"),
+    (
+        "total_quantity_sold",
+        """
+        SELECT COALESCE(SUM(r.quantity), 0)
+        FROM request r
+        JOIN pool p ON r.pool_id = p.id
+        JOIN product pr ON p.product_id = pr.id
+        WHERE pr.email = %s
+        """,
+    ),
+]
+
+METRICS = [name for name, _ in LEGACY_QUERIES]
+
+COMPANIES = ["acme@test", "no-pools@test", "no-products@test", "other@test"]
+
+
+def insert_product(cur, email, unit_price):
+    cur.execute(
+        "INSERT INTO product (name, unit_price, email) VALUES (%s, %s, %s) RETURNING id",
+        (f"Product of {email}", unit_price, email),
+    )
+    return cur.fetchone()[0]
+
+
+def insert_pool(cur, product_id, min_quantity, status, quantities):
+    cur.execute(
+        "INSERT INTO pool (product_id, start_at, end_at, min_quantity, status) VALUES (%s, CURRENT_DATE, CURRENT_DATE + 7, %s, %s) RETURNING id",
+        (product_id, min_quantity, status),
+    )
+    pool_id = cur.fetchone()[0]
+    for email, quantity in quantities:
+        cur.execute("INSERT INTO request (pool_id, email, quantity) VALUES (%s, %s, %s)", (pool_id, email, quantity))
+
+
+@pytest.fixture
+def seeded(db):
+    with db.cursor() as cur:
+        mate = insert_product(cur, "acme@test", "12.50")
+        termo = insert_product(cur, "acme@test", "30.99")
+        insert_product(cur, "acme@test", "5.00")  # sin pools
+
+        # Exactamente en el mínimo, por encima, por debajo y sin requests
+        insert_pool(cur, mate, 5, "open", [("ana@test", 2), ("beto@test", 3)])
+        insert_pool(cur, mate, 4, "success", [("ana@test", 4), ("caro@test", 1)])
+        insert_pool(cur, termo, 10, "failed", [("beto@test", 3), ("dani@test", 2)])
+        insert_pool(cur, termo, 1, "open", [])
+
+        # Empresa con productos pero sin pools
+        insert_product(cur, "no-pools@test", "8.00")
+
+        # Otra empresa con los mismos clientes: no se tiene que mezclar
+        other = insert_product(cur, "other@test", "99.99")
+        insert_pool(cur, other, 2, "open", [("ana@test", 7), ("eva@test", 1)])
+    db.commit()
+    return db
+
+
+def legacy_metrics(cur, email):
+    metrics = {}
+    for name, query in LEGACY_QUERIES:
+        cur.execute(query, (email,))
+        metrics[name] = cur.fetchone()[0]
+    return metrics
+
+
+def overview_metrics(cur, email):
+    cur.execute(OVERVIEW_QUERY, {"email": email})
+    return dict(zip(METRICS, cur.fetchone()))
+
+
+@pytest.mark.parametrize("email", COMPANIES)
+def test_overview_query_matches_legacy_queries(seeded, email):
+    with seeded.cursor() as cur:
+        assert overview_metrics(cur, email) == legacy_metrics(cur, email)
+
+
+def test_fixtures_cover_edge_cases(seeded):
+    with seeded.cursor() as cur:
+        acme = legacy_metrics(cur, "acme@test")
+        no_pools = legacy_metrics(cur, "no-pools@test")
+
+    # El pool justo en min_quantity cuenta como exitoso (>=)
+    assert acme["successful_pools"] == 2
+    assert acme["total_pools"] == 4
+    assert no_pools["total_products"] == 1
+    assert no_pools["total_pools"] == 0
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from lambda_post_pool_requests import PoolClosed, join_pool
+
+
+def create_pool(conn, min_quantity):
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO product (name, unit_price, email) VALUES ('Mate', 10, 'acme@test') RETURNING id")
+        product_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO pool (product_id, start_at, end_at, min_quantity) VALUES (%s, CURRENT_DATE, CURRENT_DATE + 7, %s) RETURNING id",
+            (product_id, min_quantity),
+        )
+        pool_id = cur.fetchone()[0]
+        cur.execute("INSERT INTO request (pool_id, email, quantity) VALUES (%s, 'first@test', %s)", (pool_id, min_quantity - 2))
+    conn.commit()
+    return pool_id
+
+
+# pg_stat_activity se congela dentro de una transacción: conn tiene que estar en autocommit
+def wait_for_lock_waiters(conn, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database() AND wait_event_type = 'Lock'")
+            if cur.fetchone()[0] >= count:
+                return
+        time.sleep(0.01)
+    pytest.fail(f"expected {count} joins waiting on the pool lock")
+
+
+# Dos joins concurrentes esperan el mismo pool bloqueado; al soltarlo compiten
+# de verdad y sólo uno puede cerrarlo
+def run_concurrent_joins(db_connect, quantities):
+    setup = db_connect()
+    pool_id = create_pool(setup, min_quantity=10)
+
+    with setup.cursor() as cur:
+        cur.execute("SELECT 1 FROM pool WHERE id = %s FOR UPDATE", (pool_id,))
+
+    results = {}
+
+    def join(email, quantity):
+        conn = db_connect()
+        try:
+            results[email] = ("joined", join_pool(conn, pool_id, email, quantity))
+        except PoolClosed:
+            conn.rollback()
+            results[email] = ("closed", None)
+
+    threads = [threading.Thread(target=join, args=(f"client{i}@test", quantity)) for i, quantity in enumerate(quantities)]
+    for thread in threads:
+        thread.start()
+    monitor = db_connect()
+    monitor.autocommit = True
+    wait_for_lock_waiters(monitor, len(threads))
+    setup.rollback()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    with setup.cursor() as cur:
+        cur.execute("SELECT status, joined_quantity FROM pool WHERE id = %s", (pool_id,))
+        pool = cur.fetchone()
+        cur.execute("SELECT dedupe_key FROM outbox WHERE dedupe_key LIKE %s", (f"pool-{pool_id}-success%",))
+        success_keys = [row[0] for row in cur.fetchall()]
+    setup.rollback()
+    return pool_id, sorted(outcome for outcome, _ in results.values()), pool, success_keys
+
+
+def test_only_one_join_closes_the_pool(db_connect):
+    # Cualquiera de los dos alcanza el mínimo por sí solo
+    pool_id, outcomes, pool, success_keys = run_concurrent_joins(db_connect, [2, 3])
+
+    assert outcomes == ["closed", "joined"]
+    assert pool[0] == "success"
+    assert success_keys == [f"pool-{pool_id}-success"]
+
+
+def test_second_join_closes_when_both_are_needed(db_connect):
+    # Ninguno llega solo: el segundo en tomar el lock es el que cierra
+    pool_id, outcomes, pool, success_keys = run_concurrent_joins(db_connect, [1, 1])
+
+    assert outcomes == ["joined", "joined"]
+    assert pool == ("success", 10)
+    assert success_keys == [f"pool-{pool_id}-success"]
@@ -22,6 +22,12 @@ variable "db_username" {
   default     = "dbadmin"
 }
 
+variable "db_reader_host" {
+  description = "Endpoint de solo lectura para las Lambdas de consulta (ej: réplica de lectura). Si está vacío se usa el RDS Proxy"
+  type        = string
+  default     = ""
+}
+
 variable "db_password" {
   description = "Contraseña para la base de datos RDS"
   type        = string
@@ -44,4 +50,21 @@ variable "lambda_runtime" {
   description = "Lambda runtime to use"
   type        = string
   default     = "python3.11"
-}
\ No newline at end of file
+}
+variable "api_router_enabled" {
+  description = "Serve every API route from a single router Lambda instead of one Lambda per route"
+  type        = bool
+  default     = false
+}
+
+variable "db_proxy_max_connections_percent" {
+  description = "Porcentaje de max_connections de la instancia que puede usar RDS Proxy; el resto queda para conexiones directas"
+  type        = number
+  default     = 75
+}
+
+variable "pool_progress_max_concurrency" {
+  description = "Máximo de long-polls de GET /pools/{id}/progress a la vez, cada uno con una conexión directa a la instancia (null para no limitar; requiere margen en la concurrencia de la cuenta)"
+  type        = number
+  default     = 10
+}
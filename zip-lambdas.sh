@@ -8,6 +8,10 @@ print_error() {
 FUNCTIONS_PATH="$PWD/functions"
 [ -d "$FUNCTIONS_PATH" ] || print_error "Functions directory not found at $FUNCTIONS_PATH"
 
+# Código compartido que se empaqueta dentro de cada Lambda
+COMMON_PATH="$FUNCTIONS_PATH/common"
+[ -d "$COMMON_PATH" ] || print_error "Common package not found at $COMMON_PATH"
+
 for file in "$FUNCTIONS_PATH"/*.py; do
     [ -f "$file" ] || continue
 
@@ -15,7 +19,10 @@ for file in "$FUNCTIONS_PATH"/*.py; do
     basename="${filename%.py}"
     zip_path="$FUNCTIONS_PATH/${basename}.zip"
 
-    if [ -f "$zip_path" ] && [ ! "$file" -nt "$zip_path" ]; then
+    sources="$COMMON_PATH"
+    [ "$filename" = "lambda_router.py" ] && sources="$FUNCTIONS_PATH"
+
+    if [ -f "$zip_path" ] && [ ! "$file" -nt "$zip_path" ] && [ -z "$(find "$sources" -name '*.py' -newer "$zip_path")" ]; then
         echo "Skipping: $file (zip is up to date)"
         continue
     fi
@@ -24,9 +31,17 @@ for file in "$FUNCTIONS_PATH"/*.py; do
 
     temp_dir=$(mktemp -d)
     cp "$file" "$temp_dir/$filename"
+    mkdir -p "$temp_dir/common"
+    cp "$COMMON_PATH"/*.py "$temp_dir/common/"
+
+    # El router despacha a los handlers de las demás funciones, así que los lleva a todos
+    if [ "$filename" = "lambda_router.py" ]; then
+        cp "$FUNCTIONS_PATH"/lambda_*.py "$temp_dir/"
+    fi
 
+    rm -f "$zip_path"
     pushd "$temp_dir" &>/dev/null
-    zip -q "$zip_path" "$filename" || echo "Error: Failed to create ZIP for $filename"
-    rm -rf "$temp_dir"
+    zip -q -r "$zip_path" ./*.py common || echo "Error: Failed to create ZIP for $filename"
     popd &>/dev/null
+    rm -rf "$temp_dir"
 done